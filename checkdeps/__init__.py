@@ -2,3 +2,5 @@ try:
     from ._version import __version__
 except ImportError:  # pragma: no cover
     __version__ = "dev"
+
+__all__ = ["__version__"]
@@ -0,0 +1,243 @@
+"""
+A persistent cache of per-file results, so that a rerun only redoes the work
+for files (or installed dists) that actually changed.
+
+Each entry remembers the file's stat info, a content digest, the parsed imports
+and the resolved provider for each import.  The verdicts are keyed by the
+content digest, the checkdeps version, the target Python version, the
+requirement/allow names, and a fingerprint of only the parts of the `DistSet`
+that the file's imports can match -- so installing an unrelated project doesn't
+invalidate the file.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from . import __version__
+from .distinfo_inference import BaseProvider, DistSet, provider_key
+
+LOG = logging.getLogger(__name__)
+
+CACHE_FILENAME = "checkdeps-results.json"
+CACHE_FORMAT = 3
+
+Verdict = Tuple[str, Optional[BaseProvider]]
+
+
+@dataclass
+class CacheLookup:
+    file_key: str
+    mtime_ns: int
+    size: int
+    digest: str
+    # None if the file needs to be parsed
+    imports: Optional[List[str]]
+    # The file's contents, if they had to be read already (until it's parsed)
+    source: Optional[bytes]
+    # Only the targets whose cached verdicts are still good
+    results: Dict[str, List[Verdict]] = field(default_factory=dict)
+    keys: Dict[str, str] = field(default_factory=dict)
+
+
+def _digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def load_cache_file(path: Path, fmt: int) -> Dict[str, Any]:
+    """
+    Returns the entries of a cache file written by `save_cache_file`, or an
+    empty dict if it's missing, unreadable, or not in format `fmt`.
+    """
+    try:
+        data = json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        LOG.warning("Ignoring unreadable cache %s: %s", path, e)
+        return {}
+    if (
+        not isinstance(data, dict)
+        or data.get("format") != fmt
+        or not isinstance(data.get("entries"), dict)
+    ):
+        LOG.info("Ignoring cache %s with a different format", path)
+        return {}
+    entries: Dict[str, Any] = data["entries"]
+    return entries
+
+
+def save_cache_file(path: Path, fmt: int, entries: Mapping[str, Any]) -> None:
+    """
+    Atomically replaces a cache file, so a concurrent or interrupted run never
+    sees half of one.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"format": fmt, "entries": entries}))
+    os.replace(tmp, path)
+
+
+def _valid_entry(entry: Any) -> bool:
+    """
+    Whether an entry has the fields and types `lookup` relies on.
+    """
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get("mtime_ns"), int)
+        and isinstance(entry.get("size"), int)
+        and isinstance(entry.get("digest"), str)
+        and isinstance(entry.get("imports"), list)
+        and all(isinstance(i, str) for i in entry["imports"])
+        and isinstance(entry.get("results"), dict)
+    )
+
+
+def distset_fingerprints(distset: DistSet) -> Dict[str, str]:
+    """
+    Returns a fingerprint per top-level name of everything in the `DistSet`
+    that a dotted name under that top-level name could resolve to.
+    """
+    buckets: Dict[str, List[str]] = {}
+    for name, prov in distset.provided_names.items():
+        kind, prov_name = provider_key(prov)
+        buckets.setdefault(name.split(".", 1)[0], []).append(
+            f"{name}\t{kind}\t{prov_name}"
+        )
+    return {k: _digest(*sorted(v)) for k, v in buckets.items()}
+
+
+class ResultCache:
+    """
+    Caches results for one or more targets (such as Python versions), each with
+    its own `DistSet` and requirement names, sharing the parse of each file.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        distsets: Mapping[str, DistSet],
+        requirement_names: Mapping[str, Iterable[str]],
+        allow_names: Iterable[str] = (),
+    ) -> None:
+        self.path = cache_dir / CACHE_FILENAME
+        self.distsets = distsets
+        allow_names = ",".join(sorted(allow_names))
+        self.fingerprints: Dict[str, Dict[str, str]] = {}
+        self.contexts: Dict[str, str] = {}
+        for target, distset in distsets.items():
+            self.fingerprints[target] = distset_fingerprints(distset)
+            self.contexts[target] = _digest(
+                __version__,
+                target,
+                ",".join(sorted(requirement_names[target])),
+                allow_names,
+            )
+        self.hits = 0
+        self.misses = 0
+        self.entries: Dict[str, Dict[str, Any]] = load_cache_file(
+            self.path, CACHE_FORMAT
+        )
+
+    def save(self) -> None:
+        save_cache_file(self.path, CACHE_FORMAT, self.entries)
+
+    def _result_key(self, target: str, digest: str, imports: Iterable[str]) -> str:
+        fingerprints = self.fingerprints[target]
+        tops = sorted({i.split(".", 1)[0] for i in imports})
+        return _digest(
+            digest,
+            self.contexts[target],
+            *(f"{t}\t{fingerprints.get(t, '')}" for t in tops),
+        )
+
+    def lookup(self, path: Path) -> CacheLookup:
+        """
+        Finds what can be reused for the given file: its imports, if it's
+        unchanged, and the verdicts for each target whose relevant providers
+        are unchanged too.
+        """
+        st = path.stat()
+        file_key = path.absolute().as_posix()
+        entry = self.entries.get(file_key)
+        if entry is not None and not _valid_entry(entry):
+            LOG.info("Ignoring malformed cache entry for %s", file_key)
+            entry = None
+        source: Optional[bytes] = None
+
+        if (
+            entry is not None
+            and entry["mtime_ns"] == st.st_mtime_ns
+            and entry["size"] == st.st_size
+        ):
+            # Cheapest path: only a stat.
+            digest: str = entry["digest"]
+        else:
+            source = path.read_bytes()
+            digest = hashlib.sha256(source).hexdigest()
+            if entry is not None and entry["digest"] != digest:
+                entry = None
+
+        ret = CacheLookup(
+            file_key,
+            st.st_mtime_ns,
+            st.st_size,
+            digest,
+            entry["imports"] if entry else None,
+            source,
+        )
+        if ret.imports is None:
+            self.misses += len(self.distsets)
+            return ret
+
+        old_results: Dict[str, Any] = entry["results"] if entry else {}
+        for target, distset in self.distsets.items():
+            # Always recomputed (it's cheap): an entry can be from any earlier
+            # run, with a different DistSet, even if the last run matched ours.
+            key = self._result_key(target, digest, ret.imports)
+            ret.keys[target] = key
+            old = old_results.get(target)
+
+            if isinstance(old, dict) and old.get("key") == key:
+                try:
+                    ret.results[target] = [
+                        (i, distset.from_key(tuple(p)) if p else None)
+                        for i, p in old["verdicts"]
+                    ]
+                    self.hits += 1
+                    continue
+                except (KeyError, ValueError, TypeError):
+                    pass
+            self.misses += 1
+        return ret
+
+    def store(
+        self,
+        lookup: CacheLookup,
+        imports: List[str],
+        results: Mapping[str, List[Verdict]],
+    ) -> None:
+        new_results: Dict[str, Any] = {}
+        for target, verdicts in results.items():
+            key = lookup.keys.get(target) or self._result_key(
+                target, lookup.digest, imports
+            )
+            new_results[target] = {
+                "key": key,
+                "verdicts": [(i, provider_key(p) if p else None) for i, p in verdicts],
+            }
+        self.entries[lookup.file_key] = {
+            "mtime_ns": lookup.mtime_ns,
+            "size": lookup.size,
+            "digest": lookup.digest,
+            "imports": imports,
+            "results": new_results,
+        }
@@ -1,26 +1,198 @@
 import logging
+import re
 import sys
 from pathlib import Path
-from typing import Optional, Set
+from typing import Dict, List, Mapping, Optional, Sequence, Set, Tuple
 
 import click
 
 import trailrunner
+from packaging.requirements import Requirement
 from stdlibs import stdlib_module_names
 
+from .cache import ResultCache
+from .depgraph import DependencyGraph
 from .distinfo import iter_all_distinfo_dirs, iter_distinfo_dirs
+from .editable import SourceScanner
 
-from .distinfo_inference import Allowed, analyze, Dist, DistSet, Namespace, Stdlib
+from .distinfo_inference import (
+    Allowed,
+    analyze,
+    Dist,
+    DistSet,
+    Namespace,
+    Stdlib,
+    UsageIndex,
+)
 
-from .import_parser import get_imports
-from .metadata import get_metadata_requirement_names
-from .requirements import iter_glob_all_requirement_names
+from .metadata import get_metadata_requirements, requirement_names_for_python
+from .report import (
+    Finding,
+    merge_reports,
+    MISSING,
+    NAMESPACE,
+    NOTHING,
+    read_report,
+    Report,
+    write_report,
+)
+from .resolve import iter_results, ParseStats
+from .requirements import (
+    iter_glob_all_requirement_names,
+    iter_glob_all_requirements,
+)
+from .shard import assign_shards, parse_shard, sort_paths
+from .walk import walk as pruned_walk, WalkStats
 
 STDLIB_MODULE_NAMES = stdlib_module_names()  # for the running version only
 LOG = logging.getLogger(__name__)
+PYTHON_VERSION_RE = re.compile(r"\d+\.\d+$")
+
+# Verdicts that are only shown with --details; the rest are report.Finding kinds
+AVAILABLE = "available"
+STDLIB = "stdlib"
+ALLOWED = "allowed"
+
+
+class DefaultCommandGroup(click.Group):
+    """
+    A group that runs `check` unless the first argument names another
+    subcommand, so `checkdeps TARGET_DIR` keeps working.
+    """
+
+    def parse_args(self, ctx: click.Context, args: List[str]) -> List[str]:
+        if not args or args[0] not in self.commands:
+            args = ["check"] + args
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultCommandGroup)
+def main() -> None:
+    pass
+
+
+def _parse_shard(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[Tuple[int, int]]:
+    if value is None:
+        return None
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def _parse_python_versions(
+    ctx: click.Context, param: click.Parameter, value: Optional[str]
+) -> Optional[List[str]]:
+    if value is None:
+        return None
+    versions = [v.strip() for v in value.split(",")]
+    for v in versions:
+        if not PYTHON_VERSION_RE.match(v):
+            raise click.BadParameter(f"{v!r} is not a Python version like 3.12")
+        try:
+            stdlib_module_names(v)
+        except ImportError:
+            raise click.BadParameter(f"Python {v} is not known to stdlibs")
+    return list(dict.fromkeys(versions))
+
+
+def _versions_suffix(python_versions: Sequence[str]) -> str:
+    if not python_versions:
+        return ""
+    return f" on Python {', '.join(python_versions)}"
+
+
+def echo_detail(
+    name: str, kind: str, provider: Optional[str], python_versions: Sequence[str]
+) -> None:
+    suffix = _versions_suffix(python_versions)
+    if kind == AVAILABLE:
+        click.secho(f"  {name} available from {provider!r}{suffix}", fg="blue")
+    elif kind == STDLIB:
+        click.secho(f"  {name} stdlib{suffix}", fg="green")
+    else:
+        click.secho(f"  {name} allow_names{suffix}", fg="yellow")
+
+
+def echo_chains(chains: Mapping[str, Sequence[str]]) -> None:
+    for name, chain in sorted(chains.items()):
+        click.echo(
+            click.style(repr(name), bold=True)
+            + " is pulled in by "
+            + " -> ".join(chain)
+        )
+
+
+def echo_unused(unused: Sequence[str]) -> None:
+    for name in unused:
+        click.echo(
+            click.style(repr(name), bold=True, fg="red")
+            + " is in requirements but nothing imports it"
+        )
 
 
-@click.command()
+def echo_skipped(skipped: Mapping[Path, str]) -> None:
+    for path, reason in sorted(skipped.items()):
+        click.secho(
+            f"warning: {path.as_posix()} was not checked: {reason}",
+            fg="yellow",
+            err=True,
+        )
+
+
+def echo_slowest(times: Mapping[Path, float], n: int) -> None:
+    slowest = sorted(times.items(), key=lambda kv: (-kv[1], kv[0]))[:n]
+    if not slowest:
+        return
+    click.echo("Slowest files to parse:", err=True)
+    for path, seconds in slowest:
+        click.echo(f"  {seconds:8.3f}s  {path.as_posix()}", err=True)
+
+
+def echo_walk_stats(stats: WalkStats) -> None:
+    click.echo(
+        f"Walk skipped {stats.dirs_skipped} directories and "
+        f"{stats.files_skipped} files",
+        err=True,
+    )
+
+
+def echo_finding(finding: Finding, missing_projects_only: bool) -> None:
+    suffix = _versions_suffix(finding.python_versions)
+    if finding.kind == MISSING:
+        if not missing_projects_only:
+            click.echo(
+                f"{finding.path} uses "
+                + click.style(finding.name, bold=True)
+                + " but "
+                + click.style(repr(finding.provider), bold=True, fg="red")
+                + " not in requirements"
+                + suffix,
+            )
+    elif finding.kind == NAMESPACE:
+        click.echo(
+            f"{finding.path} uses "
+            + click.style(finding.name, bold=True)
+            + f" but this appears to be a namespace package from {finding.provider}"
+            + " without a more specific provider"
+            + suffix
+        )
+    else:
+        # TODO this might go to stderr, especially for
+        # missing-projects-only mode
+        click.echo(
+            f"{finding.path} uses "
+            + click.style(finding.name, bold=True)
+            + " but there is "
+            + click.style("nothing installed", fg="red")
+            + " to provide it"
+            + suffix,
+        )
+
+
+@main.command()
 @click.option(
     "--requirements",
     default="requirements*.txt",
@@ -55,8 +227,66 @@ LOG = logging.getLogger(__name__)
 @click.option(
     "--excludes", help="Comma-separated gitignore-style paths to exclude from checking"
 )
+@click.option(
+    "--fast-walk",
+    is_flag=True,
+    help="Prune excluded directories (and virtualenvs, node_modules, etc) before listing them",
+)
+@click.option(
+    "--cache-dir",
+    help="Directory to keep per-file results in, so unchanged files are not rechecked",
+    type=click.Path(file_okay=False, path_type=Path),
+)
+@click.option(
+    "--shard",
+    help="Only check part K of N (like 2/4) of the files; combine with --report and `checkdeps merge`",
+    callback=_parse_shard,
+)
+@click.option(
+    "--report",
+    help="Write a machine-readable report to this file",
+    type=click.Path(dir_okay=False, path_type=Path),
+)
+@click.option(
+    "--python-versions",
+    callback=_parse_python_versions,
+    help="Check against the stdlib and requirement markers of these Python versions (comma-separated, like 3.8,3.12) instead of the running one",
+)
+@click.option(
+    "--unused-requirements",
+    is_flag=True,
+    help="Also report installed requirements that nothing imports",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of worker processes for parsing and resolving imports",
+)
+@click.option(
+    "--slowest",
+    default=0,
+    type=click.IntRange(min=0),
+    metavar="N",
+    help="Show the N files that took longest to parse",
+)
+@click.option(
+    "--max-file-size",
+    type=click.IntRange(min=0),
+    metavar="BYTES",
+    help="Skip (with a warning) files larger than this",
+)
+@click.option(
+    "--parse-timeout",
+    type=click.FloatRange(min=0, min_open=True),
+    metavar="SECONDS",
+    help="Parse in child processes, skipping (with a warning) files that take "
+    "longer than this",
+)
 @click.argument("target_dir", type=click.Path(exists=True, path_type=Path))
-def main(
+def check(
     requirements: str,
     target_dir: Path,
     installed_path: Optional[Path],
@@ -68,9 +298,17 @@ def main(
     no_metadata: bool,
     metadata_extras: Optional[str],
     excludes: Optional[str],
+    fast_walk: bool,
+    cache_dir: Optional[Path],
+    shard: Optional[Tuple[int, int]],
+    report: Optional[Path],
+    python_versions: Optional[List[str]],
+    unused_requirements: bool,
+    jobs: int,
+    slowest: int,
+    max_file_size: Optional[int],
+    parse_timeout: Optional[float],
 ) -> None:
-    requirement_names: Set[Optional[str]] = {None}
-
     logging.basicConfig(
         level=logging.DEBUG if verbose else logging.ERROR,
         format="%(asctime)-15s %(levelname)-8s %(name)s:%(lineno)s %(message)s",
@@ -81,91 +319,249 @@ def main(
         project_root = trailrunner.project_root(target_dir)
 
     # Part 1
-    if no_metadata:
-        requirement_names = set(
+    declared: List[Requirement] = []
+    # Names whose markers don't matter
+    declared_names: Set[str] = set()
+    if no_metadata and not python_versions:
+        declared_names.update(
             iter_glob_all_requirement_names(requirements, project_root)
         )
+    elif no_metadata:
+        declared.extend(iter_glob_all_requirements(requirements, project_root))
     else:
-        metadata_requirements = get_metadata_requirement_names(project_root)
-        requirement_names |= set(metadata_requirements.get("", ()))
+        metadata_requirements = get_metadata_requirements(project_root)
+        declared.extend(metadata_requirements.get("", ()))
         if metadata_extras:
             for extra in metadata_extras.split(","):
-                extra_requirements = set(metadata_requirements.get(extra.strip(), ()))
+                extra_requirements = metadata_requirements.get(extra.strip(), ())
                 LOG.info("extra %s: %s", extra, extra_requirements)
-                requirement_names |= extra_requirements
+                declared.extend(extra_requirements)
+
+    # The running interpreter is "", for which markers are ignored
+    targets = python_versions or [""]
+    requirement_names: Dict[str, Set[str]] = {
+        t: declared_names | requirement_names_for_python(declared, t or None)
+        for t in targets
+    }
 
     # Part 2
-    distset = DistSet()
+    base_distset = DistSet()
+    distinfo_dirs: Dict[str, Path] = {}
+    # Editable installs' source trees
+    scanner = SourceScanner(cache_dir)
     if not installed_path:
         for p, v, d in iter_all_distinfo_dirs():
-            dist = analyze(d, p)
-            distset.add_dist(dist)
+            dist = analyze(d, p, scanner)
+            base_distset.add_dist(dist)
+            distinfo_dirs.setdefault(p, d)
             LOG.debug("distinfo: %r", dist)
     else:  # pragma: no cover
         for p, v, d in iter_distinfo_dirs(Path(installed_path)):
-            dist = analyze(d, p)
-            distset.add_dist(dist)
+            dist = analyze(d, p, scanner)
+            base_distset.add_dist(dist)
+            distinfo_dirs.setdefault(p, d)
             LOG.debug("distinfo: %r", dist)
+    LOG.info("editable scans: %d hits, %d misses", scanner.hits, scanner.misses)
+    scanner.save()
 
     # Part 2b (first-party names, even if they're installed)
     if allow_names:
         for name in allow_names.split(","):
-            distset.add_explicit(name, Allowed(name))
+            base_distset.add_explicit(name, Allowed(name))
+
+    # Part 2c (stdlib, per target).  add_explicit is O(provided names), so the
+    # names every target shares are only added once.
+    stdlib_names = {
+        t: set(stdlib_module_names(t) if t else STDLIB_MODULE_NAMES) for t in targets
+    }
+    shared_stdlib_names = set.intersection(*stdlib_names.values())
+    shared_distset = DistSet(dict(base_distset.provided_names))
+    for name in sorted(shared_stdlib_names):
+        shared_distset.add_explicit(name, Stdlib(name))
+    distsets: Dict[str, DistSet] = {}
+    for t in targets:
+        distset = DistSet(dict(shared_distset.provided_names))
+        for name in sorted(stdlib_names[t] - shared_stdlib_names):
+            distset.add_explicit(name, Stdlib(name))
+        distsets[t] = distset
 
-    # Part 2c (stdlib)
-    for name in STDLIB_MODULE_NAMES:
-        distset.add_explicit(name, Stdlib(name))
+    cache: Optional[ResultCache] = None
+    if cache_dir:
+        cache = ResultCache(
+            cache_dir,
+            distsets,
+            requirement_names,
+            allow_names.split(",") if allow_names else (),
+        )
 
     # Part 3
+    exclude_patterns = excludes.split(",") if excludes else None
+    if fast_walk:
+        walk_stats = WalkStats()
+        paths = list(
+            pruned_walk(Path(target_dir), excludes=exclude_patterns, stats=walk_stats)
+        )
+        echo_walk_stats(walk_stats)
+    else:
+        paths = list(trailrunner.walk(Path(target_dir), excludes=exclude_patterns))
+    # Walk order depends on the filesystem; findings are ordered by position in
+    # this list, so it has to be the same on every shard.
+    paths = sort_paths(paths, project_root)
+    shard_k, shard_n = shard or (1, 1)
+    assignment = assign_shards(paths, project_root, shard_n) if shard else {}
+
     missing_projects: Set[Dist] = set()
-    for path in trailrunner.walk(
-        Path(target_dir), excludes=(excludes.split(",") if excludes else None)
-    ):
+    findings: List[Finding] = []
+    usage = UsageIndex()
+    selected = [
+        (index, path)
+        for index, path in enumerate(paths)
+        if not shard or assignment[path] == shard_k
+    ]
+    parse_stats = ParseStats()
+    all_results = iter_results(
+        [p for _, p in selected],
+        distsets,
+        cache,
+        jobs,
+        max_file_size=max_file_size,
+        parse_timeout=parse_timeout,
+        stats=parse_stats,
+    )
+    for (index, path), results in zip(selected, all_results):
         if details:
             print(f"{path.as_posix()}:")
-        imports = get_imports(path)
-        for i in sorted(imports):
-            prov = distset.find_provider(i)
-            # Allow and Stdlib get a pass for now
-            if isinstance(prov, Dist):
-                if prov.name not in requirement_names:
-                    missing_projects.add(prov)
-                    if not missing_projects_only:
-                        click.echo(
-                            f"{path.as_posix()} uses "
-                            + click.style(i, bold=True)
-                            + " but "
-                            + click.style(repr(prov.name), bold=True, fg="red")
-                            + " not in requirements",
-                        )
-                if details:
-                    click.secho(f"  {i} available from {prov.name!r}", fg="blue")
-            elif isinstance(prov, Stdlib):
-                if details:
-                    click.secho(f"  {i} stdlib", fg="green")
-            elif isinstance(prov, Allowed):
+
+        # Identical verdicts across targets are only shown once
+        grouped: Dict[Tuple[str, str, Optional[str]], List[str]] = {}
+        for t, verdicts in results.items():
+            for i, prov in verdicts:
+                if isinstance(prov, (Dist, Namespace)):
+                    usage.add(prov, path.as_posix(), i)
+                # Allow and Stdlib get a pass for now
+                if isinstance(prov, Dist):
+                    if prov.name not in requirement_names[t]:
+                        missing_projects.add(prov)
+                        kind = MISSING
+                    else:
+                        kind = AVAILABLE
+                elif isinstance(prov, Stdlib):
+                    kind = STDLIB
+                elif isinstance(prov, Allowed):
+                    kind = ALLOWED
+                elif isinstance(prov, Namespace):
+                    kind = NAMESPACE
+                else:
+                    kind = NOTHING
+                key = (i, kind, prov.name if prov else None)
+                grouped.setdefault(key, []).append(t)
+
+        for (i, kind, provider), versions in sorted(grouped.items()):
+            python_versions_shown = (
+                tuple(versions) if len(versions) < len(targets) else ()
+            )
+            if kind in (AVAILABLE, STDLIB, ALLOWED):
                 if details:
-                    click.secho(f"  {i} allow_names", fg="yellow")
-            elif isinstance(prov, Namespace):
-                click.echo(
-                    f"{path.as_posix()} uses "
-                    + click.style(i, bold=True)
-                    + f" but this appears to be a namespace package from {prov.name}"
-                    + " without a more specific provider"
-                )
+                    echo_detail(i, kind, provider, python_versions_shown)
             else:
-                # TODO this might go to stderr, especially for
-                # missing-projects-only mode
-                click.echo(
-                    f"{path.as_posix()} uses "
-                    + click.style(i, bold=True)
-                    + " but there is "
-                    + click.style("nothing installed", fg="red")
-                    + " to provide it",
+                finding = Finding(
+                    index, path.as_posix(), i, kind, provider, python_versions_shown
                 )
+                echo_finding(finding, missing_projects_only)
+                findings.append(finding)
+
+    echo_skipped(parse_stats.skipped)
+    if slowest:
+        echo_slowest(parse_stats.times, slowest)
+
+    if cache:
+        LOG.info("cache: %d hits, %d misses", cache.hits, cache.misses)
+        cache.save()
+
+    # Which declared requirement pulls in each missing project
+    chains: Dict[str, List[str]] = {}
+    if missing_projects:
+        graph = DependencyGraph(distinfo_dirs, cache_dir)
+        chains = graph.shortest_chains(
+            set().union(*requirement_names.values()),
+            {p.name for p in missing_projects},
+        )
+        graph.save()
+        if not missing_projects_only:
+            echo_chains(chains)
+
+    # Only installed projects can be checked for use; the rest would just be
+    # "nothing installed" noise.
+    installed = {
+        p.name
+        for p in base_distset.provided_names.values()
+        if isinstance(p, (Dist, Namespace))
+    }
+    declared_projects = set().union(*requirement_names.values()) & installed
+    # A single shard can't tell; that's left to `checkdeps merge`
+    unused: List[str] = []
+    if unused_requirements and not shard:
+        unused = usage.unused(declared_projects)
+        echo_unused(unused)
+
+    if report:
+        write_report(
+            report,
+            Report(
+                shard=shard_k,
+                total=shard_n,
+                findings=findings,
+                missing_projects={p.name for p in missing_projects},
+                used_projects=set(usage.users),
+                declared_projects=declared_projects,
+                chains=chains,
+            ),
+        )
+
     if missing_projects_only:
         print(sorted([p.name for p in missing_projects]))
-    if missing_projects:
+    if missing_projects or unused:
+        sys.exit(1)
+
+
+@main.command()
+@click.option(
+    "--missing-projects-only", is_flag=True, help="Show names of missing projects only"
+)
+@click.option(
+    "--unused-requirements",
+    is_flag=True,
+    help="Also report installed requirements that nothing imports",
+)
+@click.argument(
+    "reports",
+    nargs=-1,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+)
+def merge(
+    reports: Tuple[Path, ...], missing_projects_only: bool, unused_requirements: bool
+) -> None:
+    """
+    Combines the --report files from every --shard into the same output and
+    exit code as an unsharded run.
+    """
+    try:
+        merged = merge_reports([read_report(r) for r in reports])
+    except (ValueError, KeyError, TypeError) as e:
+        raise click.ClickException(str(e))
+
+    for finding in merged.findings:
+        echo_finding(finding, missing_projects_only)
+    if not missing_projects_only:
+        echo_chains(merged.chains)
+    unused: List[str] = []
+    if unused_requirements:
+        unused = sorted(merged.declared_projects - merged.used_projects)
+        echo_unused(unused)
+    if missing_projects_only:
+        print(sorted(merged.missing_projects))
+    if merged.missing_projects or unused:
         sys.exit(1)
 
 
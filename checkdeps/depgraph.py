@@ -0,0 +1,146 @@
+"""
+Explains missing first-order deps by finding which declared requirement pulls
+them in, using the installed dists' `Requires-Dist` metadata.
+
+The graph is built lazily: a breadth-first search from the declared
+requirements only reads the metadata of dists it actually reaches, and only the
+header block of each `METADATA` file.  Parsed edges can be persisted so later
+runs don't need to reread unchanged dists.
+"""
+
+import os
+import re
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Mapping, Optional
+
+from packaging.utils import canonicalize_name
+
+from .cache import load_cache_file, save_cache_file
+
+REQUIRES_CACHE_FILENAME = "checkdeps-requires.json"
+REQUIRES_CACHE_FORMAT = 1
+
+_NAME_RE = re.compile(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def _name(spec: str) -> Optional[str]:
+    m = _NAME_RE.match(spec)
+    return canonicalize_name(m.group(1)) if m else None
+
+
+def read_requires(distinfo_dir: Path) -> List[str]:
+    """
+    Returns the canonical names a dist unconditionally depends on (that is,
+    ignoring requirements that only apply to an extra).
+    """
+    names: List[str] = []
+    if distinfo_dir.name.endswith(".egg-info"):
+        try:
+            text = (distinfo_dir / "requires.txt").read_text()
+        except OSError:
+            return names
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith("["):
+                # [extra] and [extra:marker] are extras-only; [:marker] is not
+                if not line.startswith("[:"):
+                    break
+                continue
+            if line and (name := _name(line)):
+                names.append(name)
+        return names
+
+    try:
+        f = open(distinfo_dir / "METADATA", encoding="utf-8", errors="replace")
+    except OSError:
+        return names
+    with f:
+        for line in f:
+            if not line.strip():
+                # End of headers; the rest is the long description
+                break
+            if line.startswith("Requires-Dist:"):
+                spec, _, marker = line[len("Requires-Dist:") :].partition(";")
+                if "extra" in marker:
+                    continue
+                if name := _name(spec):
+                    names.append(name)
+    return names
+
+
+class DependencyGraph:
+    def __init__(
+        self, distinfo_dirs: Mapping[str, Path], cache_dir: Optional[Path] = None
+    ) -> None:
+        self.distinfo_dirs = distinfo_dirs
+        self.cache_path = cache_dir / REQUIRES_CACHE_FILENAME if cache_dir else None
+        self._requires: Dict[str, List[str]] = {}
+        self._cached: Dict[str, Any] = (
+            load_cache_file(self.cache_path, REQUIRES_CACHE_FORMAT)
+            if self.cache_path
+            else {}
+        )
+        self._dirty = False
+
+    def requires(self, project: str) -> List[str]:
+        if project in self._requires:
+            return self._requires[project]
+        distinfo_dir = self.distinfo_dirs.get(project)
+        if distinfo_dir is None:
+            ret: List[str] = []
+        else:
+            key = distinfo_dir.as_posix()
+            try:
+                mtime_ns = os.stat(distinfo_dir).st_mtime_ns
+            except OSError:
+                mtime_ns = 0
+            entry = self._cached.get(key)
+            if (
+                isinstance(entry, dict)
+                and entry.get("mtime_ns") == mtime_ns
+                and isinstance(entry.get("requires"), list)
+            ):
+                ret = entry["requires"]
+            else:
+                ret = read_requires(distinfo_dir)
+                self._cached[key] = {"mtime_ns": mtime_ns, "requires": ret}
+                self._dirty = True
+        self._requires[project] = ret
+        return ret
+
+    def save(self) -> None:
+        if self.cache_path and self._dirty:
+            save_cache_file(self.cache_path, REQUIRES_CACHE_FORMAT, self._cached)
+
+    def shortest_chains(
+        self, roots: Iterable[str], targets: Iterable[str]
+    ) -> Dict[str, List[str]]:
+        """
+        Returns, for each target reachable from a root, the shortest chain of
+        project names from a root to it (ties broken alphabetically).
+        """
+        remaining = set(targets)
+        parent: Dict[str, Optional[str]] = {}
+        queue: Deque[str] = deque()
+        for root in sorted(set(roots)):
+            parent[root] = None
+            queue.append(root)
+
+        ret: Dict[str, List[str]] = {}
+        while queue and remaining:
+            node = queue.popleft()
+            for dep in sorted(self.requires(node)):
+                if dep in parent:
+                    continue
+                parent[dep] = node
+                if dep in remaining:
+                    remaining.discard(dep)
+                    chain = [dep]
+                    p: Optional[str] = node
+                    while p is not None:
+                        chain.append(p)
+                        p = parent[p]
+                    ret[dep] = chain[::-1]
+                queue.append(dep)
+        return ret
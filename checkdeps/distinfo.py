@@ -7,44 +7,73 @@
 import re
 import sys
 from pathlib import Path
-from typing import Generator, Tuple
+from typing import Generator, List, Set, Tuple
 
 from packaging.utils import canonicalize_name
 
+from .editable import read_pth
+
 DISTINFO_RE = re.compile(r"([^-]+)-(.*?)\.dist-info$")
 EGGINFO_RE = re.compile(r"([^-]+)-([^-]+)-([^-]+)\.egg-info$")
+# In a source tree, from `setup.py develop`
+DEVELOP_EGGINFO_RE = re.compile(r"([^-]+)\.egg-info$")
 
 
 def iter_all_distinfo_dirs() -> Generator[Tuple[str, str, Path], None, None]:
+    seen: Set[str] = set()
+    visited: Set[Path] = set()
     for p in sys.path:
         path = Path(p)
         if path.is_dir():
-            yield from iter_distinfo_dirs(path)
+            yield from _iter_distinfo_dirs(path, seen, visited)
 
 
 def iter_distinfo_dirs(path: Path) -> Generator[Tuple[str, str, Path], None, None]:
-    for subdir in path.iterdir():
-        # TODO .pth files?
+    """
+    Yields (project, version, dir) for the dists in `path` and in the
+    directories its `.pth` files add (like `setup.py develop` source trees).
+    Like importlib, only the first dist found for each project counts.
+    """
+    yield from _iter_distinfo_dirs(path, set(), set())
+
+
+def _iter_distinfo_dirs(
+    path: Path, seen: Set[str], visited: Set[Path]
+) -> Generator[Tuple[str, str, Path], None, None]:
+    if path.resolve() in visited:
+        return
+    visited.add(path.resolve())
+
+    pth_dirs: List[Path] = []
+    for subdir in sorted(path.iterdir()):
         if subdir.name.endswith(".dist-info") and subdir.is_dir():
             m = DISTINFO_RE.match(subdir.name)
             if not m:  # pragma: no cover
                 continue
             (project, version) = m.groups()
-
-            # Change from underscores to dashes
-            project = canonicalize_name(project)
-
-            yield project, version, subdir
         elif subdir.name.endswith(".egg-info") and subdir.is_dir():
-            m = EGGINFO_RE.match(subdir.name)
-            if not m:  # pragma: no cover
+            if m := EGGINFO_RE.match(subdir.name):
+                (project, version, pyver) = m.groups()
+            elif m := DEVELOP_EGGINFO_RE.match(subdir.name):
+                (project, version) = m.group(1), ""
+            else:  # pragma: no cover
                 continue
-            (project, version, pyver) = m.groups()
+        elif subdir.name.endswith(".pth") and subdir.is_file():
+            pth_dirs.extend(read_pth(subdir)[0])
+            continue
+        else:
+            continue
+
+        # Change from underscores to dashes
+        project = canonicalize_name(project)
+        if project in seen:
+            continue
+        seen.add(project)
 
-            # Change from underscores to dashes
-            project = canonicalize_name(project)
+        yield project, version, subdir
 
-            yield project, version, subdir
+    for d in pth_dirs:
+        yield from _iter_distinfo_dirs(d, seen, visited)
 
 
 if __name__ == "__main__":  # pragma: no cover
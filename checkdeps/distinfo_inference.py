@@ -2,10 +2,29 @@ import logging
 import sys
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, FrozenSet, Generator, Optional, Set
+from typing import (
+    Dict,
+    FrozenSet,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from .distinfo import DEVELOP_EGGINFO_RE
+from .editable import editable_packages, read_top_level, SourceScanner
 
 LOG = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+SITE_DIR_NAMES = frozenset({"site-packages", "dist-packages"})
+
 
 @dataclass(eq=True, frozen=True)
 class BaseProvider:
@@ -34,11 +53,23 @@ class Namespace(BaseProvider):
     pass
 
 
+# Providers as plain (class name, name) pairs, for storing or sending elsewhere
+ProviderKey = Tuple[str, str]
+
+
+def provider_key(provider: BaseProvider) -> ProviderKey:
+    return (type(provider).__name__, provider.name)
+
+
 @dataclass
 class DistSet:
     provided_names: Dict[str, BaseProvider] = field(default_factory=dict)
+    _dists: Optional[Dict[str, Dist]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def add_dist(self, dist: Dist) -> None:
+        self._dists = None
         for n in dist.provided_names:
             if item := self.provided_names.get(n):
                 LOG.warning(
@@ -55,6 +86,7 @@ class DistSet:
             self.provided_names[n] = Namespace(dist.name)
 
     def add_explicit(self, dotted_name: str, provider: BaseProvider) -> None:
+        self._dists = None
         self.provided_names[dotted_name] = provider
         # Ensure there are no more specific references to this (preumably
         # top-level) name.
@@ -65,6 +97,24 @@ class DistSet:
         for k in to_delete:
             del self.provided_names[k]
 
+    def from_key(self, key: ProviderKey) -> BaseProvider:
+        """
+        The inverse of `provider_key` for providers in this set; raises KeyError
+        if there's no such provider.
+        """
+        kind, name = key
+        if kind == "Dist":
+            if self._dists is None:
+                self._dists = {
+                    p.name: p
+                    for p in self.provided_names.values()
+                    if isinstance(p, Dist)
+                }
+            return self._dists[name]
+        return {"Allowed": Allowed, "Stdlib": Stdlib, "Namespace": Namespace}[kind](
+            name
+        )
+
     def find_provider(self, dotted_name: str) -> Optional[BaseProvider]:
         # TODO there could be more than one project that provides the same name,
         # e.g. a foo.pyc and a foo.py
@@ -75,13 +125,77 @@ class DistSet:
         return None
 
 
+def prefix_sort_key(dotted_name: str) -> str:
+    """
+    A sort key under which a name sorts just before all the names it's a
+    (dotted) prefix of, so those form a contiguous run.
+    """
+    return dotted_name + "."
+
+
+def find_providers_sorted(
+    dotted_names: Sequence[str],
+    table: Iterable[Tuple[str, T]],
+    parents: Sequence[Tuple[str, T]] = (),
+) -> Iterator[Tuple[str, Optional[T]]]:
+    """
+    Finds the longest provided prefix of each name, like
+    `DistSet.find_provider`, by merging two lists that are sorted by
+    `prefix_sort_key`.
+
+    If `table` doesn't start at the beginning, `parents` must be the entries
+    before it that are prefixes of the first name, shortest first.
+    """
+    # Entries that are prefixes of each other, shortest first.  Anything that
+    # isn't a prefix of the current name can't be one of any later name either.
+    stack = list(parents)
+    it = iter(table)
+    pending = next(it, None)
+    for name in dotted_names:
+        key = prefix_sort_key(name)
+        while pending is not None and prefix_sort_key(pending[0]) <= key:
+            entry_key = prefix_sort_key(pending[0])
+            while stack and not entry_key.startswith(prefix_sort_key(stack[-1][0])):
+                stack.pop()
+            stack.append(pending)
+            pending = next(it, None)
+        while stack and not key.startswith(prefix_sort_key(stack[-1][0])):
+            stack.pop()
+        yield name, (stack[-1][1] if stack else None)
+
+
+@dataclass
+class UsageIndex:
+    """
+    Reverse index from a provider's (project) name to the (path, dotted name)
+    pairs that resolved to it.
+    """
+
+    users: Dict[str, Set[Tuple[str, str]]] = field(default_factory=dict)
+
+    def add(self, provider: BaseProvider, path: str, dotted_name: str) -> None:
+        self.users.setdefault(provider.name, set()).add((path, dotted_name))
+
+    def unused(self, names: Iterable[str]) -> List[str]:
+        return sorted(n for n in names if n not in self.users)
+
+
 def iterparents(f: str) -> Generator[str, None, None]:
     while "." in f:
         f = f.rsplit(".", 1)[0]
         yield f
 
 
-def analyze(distinfo_dir: Path, name: str) -> Dist:
+def analyze(
+    distinfo_dir: Path, name: str, scanner: Optional[SourceScanner] = None
+) -> Dist:
+    """
+    Finds the dotted names a dist provides from its RECORD (or egg-info file
+    list), plus the source trees of editable installs, which are scanned with
+    `scanner` so that they can be cached.
+    """
+    if scanner is None:
+        scanner = SourceScanner()
     packages: Set[str] = set()
     namespace_packages: Set[str] = set()
     egg_info_mode: bool = False
@@ -95,9 +209,27 @@ def analyze(distinfo_dir: Path, name: str) -> Dist:
     else:
         record_path = distinfo_dir / "RECORD"
 
+    lines: List[str] = []
+    if egg_info_mode and not record_path.exists():
+        # `setup.py develop` leaves the egg-info in the source tree, next to
+        # the modules, with no list of installed files.  Anywhere else (or
+        # without top_level.txt) the neighbouring modules could be anyone's.
+        top_level = read_top_level(distinfo_dir)
+        if (
+            DEVELOP_EGGINFO_RE.match(distinfo_dir.name)
+            and distinfo_dir.parent.name not in SITE_DIR_NAMES
+            and top_level
+        ):
+            packages |= scanner.path_entry(distinfo_dir.parent, top_level)
+        else:
+            LOG.info("%s has no installed-files.txt, skipping", distinfo_dir)
+    else:
+        lines = record_path.read_text().splitlines(True)
+
     # This is in two phases because otherwise we'd need to set __init__.py
     # before all other .py entries under a dir
-    for line in record_path.read_text().splitlines(True):
+    pth_filenames: List[str] = []
+    for line in lines:
         if egg_info_mode:
             filename = line.strip()
             if filename.startswith("../"):
@@ -107,6 +239,10 @@ def analyze(distinfo_dir: Path, name: str) -> Dist:
         else:
             filename, _ = line.split(",", 1)
 
+        if filename.endswith(".pth"):
+            pth_filenames.append(filename)
+            continue
+
         if ".." in filename:
             # docutils 0.18.1 seems to include a bin dir this way
             continue
@@ -121,6 +257,10 @@ def analyze(distinfo_dir: Path, name: str) -> Dist:
                 package = package[: -len(".__init__")]
             packages.add(package)
 
+    if pth_filenames:
+        # Editable installs only record a .pth (and maybe an import hook)
+        packages |= editable_packages(distinfo_dir, pth_filenames, scanner)
+
     for package in sorted(packages):
         # Dragons: this is intended to detect new-style namespaces that are
         # _subdirs_ not individual files.  This isn't true for
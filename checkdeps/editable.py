@@ -0,0 +1,284 @@
+"""
+Finds the modules of editable installs, whose RECORD lists a `.pth` file (and
+maybe an import hook) rather than the modules themselves.
+
+Nothing is imported or executed; this understands
+
+* directory lines in `.pth` files, as written by most backends in their
+  default mode and by `setup.py develop`,
+* the `MAPPING` dict in setuptools' `__editable___*_finder.py` hooks, and
+  `map_module(name, path)` calls in hooks written with `editables`,
+* and, when neither turns anything up, the source tree named in
+  `direct_url.json`.
+
+Walking a large source tree is slow, so `SourceScanner` can keep its results in
+a cache dir.  Entries are checked by stat-ing each directory in the tree (adding
+or removing a module changes its directory's mtime) rather than listing them.
+"""
+
+import ast
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Collection, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlparse
+from urllib.request import url2pathname
+
+LOG = logging.getLogger(__name__)
+
+SCAN_CACHE_FILENAME = "checkdeps-editable.json"
+SCAN_CACHE_FORMAT = 1
+
+
+def read_pth(path: Path) -> Tuple[List[Path], List[str]]:
+    """
+    Returns the existing directories a `.pth` file adds to `sys.path`, and the
+    modules its `import` lines would import.
+    """
+    dirs: List[Path] = []
+    imports: List[str] = []
+    try:
+        text = path.read_text(errors="replace")
+    except OSError as e:
+        LOG.warning("Can't read %s: %s", path, e)
+        return dirs, imports
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith(("import ", "import\t")):
+            try:
+                tree = ast.parse(line)
+            except SyntaxError:
+                continue
+            for node in tree.body:
+                if isinstance(node, ast.Import):
+                    imports.extend(alias.name for alias in node.names)
+            continue
+        d = path.parent / line
+        if d.is_dir():
+            dirs.append(d)
+    return dirs, imports
+
+
+def read_finder_mapping(path: Path) -> Dict[str, Path]:
+    """
+    Returns the module name -> path mapping from an editable import hook, read
+    from its source.
+    """
+    try:
+        tree = ast.parse(path.read_bytes())
+    except (OSError, SyntaxError, ValueError) as e:
+        LOG.warning("Can't parse editable finder %s: %s", path, e)
+        return {}
+
+    mapping: Dict[str, Path] = {}
+    for node in ast.walk(tree):
+        value: Any = None
+        if isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id == "MAPPING" for t in node.targets
+        ):
+            value = node.value
+        elif (
+            isinstance(node, ast.AnnAssign)
+            and isinstance(node.target, ast.Name)
+            and node.target.id == "MAPPING"
+        ):
+            value = node.value
+        elif (
+            isinstance(node, ast.Call)
+            and len(node.args) == 2
+            and (
+                (
+                    isinstance(node.func, ast.Attribute)
+                    and node.func.attr == "map_module"
+                )
+                or (isinstance(node.func, ast.Name) and node.func.id == "map_module")
+            )
+        ):
+            value = ast.Tuple(elts=node.args, ctx=ast.Load())
+
+        if value is None:
+            continue
+        try:
+            literal = ast.literal_eval(value)
+        except ValueError:
+            continue
+        if isinstance(literal, tuple):
+            literal = dict([literal])
+        if isinstance(literal, dict):
+            for k, v in literal.items():
+                if isinstance(k, str) and isinstance(v, str):
+                    mapping[k] = Path(v)
+    return mapping
+
+
+def read_direct_url(distinfo_dir: Path) -> Optional[Path]:
+    """
+    Returns the source directory of an editable install, per `direct_url.json`.
+    """
+    try:
+        data = json.loads((distinfo_dir / "direct_url.json").read_text())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        LOG.warning("Ignoring unreadable %s/direct_url.json: %s", distinfo_dir, e)
+        return None
+    if not isinstance(data, dict) or not data.get("dir_info", {}).get("editable"):
+        return None
+    url = urlparse(data.get("url", ""))
+    if url.scheme != "file":
+        return None
+    return Path(url2pathname(unquote(url.path)))
+
+
+def read_top_level(distinfo_dir: Path) -> Optional[Set[str]]:
+    try:
+        text = (distinfo_dir / "top_level.txt").read_text()
+    except OSError:
+        return None
+    return {line.strip() for line in text.splitlines() if line.strip()} or None
+
+
+class SourceScanner:
+    def __init__(self, cache_dir: Optional[Path] = None) -> None:
+        self.cache_path = cache_dir / SCAN_CACHE_FILENAME if cache_dir else None
+        self._cached: Dict[str, Any] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if self.cache_path:
+            # Not at the top: cache imports distinfo_inference, which imports us
+            from .cache import load_cache_file
+
+            self._cached = load_cache_file(self.cache_path, SCAN_CACHE_FORMAT)
+
+    def save(self) -> None:
+        if self.cache_path and self._dirty:
+            from .cache import save_cache_file
+
+            save_cache_file(self.cache_path, SCAN_CACHE_FORMAT, self._cached)
+
+    def _unchanged(self, root: Path, dirs: Dict[str, int]) -> bool:
+        for rel, mtime_ns in dirs.items():
+            try:
+                if os.stat(root / rel).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _scan_tree(self, root: Path) -> List[str]:
+        """
+        Returns the relative posix paths of the importable `.py` files under
+        `root`.
+        """
+        key = root.as_posix()
+        cached = self._cached.get(key)
+        try:
+            if cached and self._unchanged(root, cached["dirs"]):
+                self.hits += 1
+                return [str(f) for f in cached["files"]]
+        except (KeyError, TypeError, AttributeError):
+            LOG.info("Ignoring malformed cache entry for %s", key)
+
+        self.misses += 1
+        dirs: Dict[str, int] = {}
+        files: List[str] = []
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            d = root / rel if rel else root
+            try:
+                dirs[rel or "."] = os.stat(d).st_mtime_ns
+                entries = sorted(os.scandir(d), key=lambda e: e.name)
+            except OSError as e:
+                LOG.info("Can't scan %s: %s", d, e)
+                continue
+            for entry in entries:
+                child = f"{rel}/{entry.name}" if rel else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name.isidentifier():
+                        stack.append(child)
+                elif entry.name.endswith(".py") and entry.name[:-3].isidentifier():
+                    files.append(child)
+        files.sort()
+        self._cached[key] = {"dirs": dirs, "files": files}
+        self._dirty = True
+        return files
+
+    def modules(self, name: str, path: Path) -> Set[str]:
+        """
+        Returns the dotted names provided by the module or package `name`,
+        whose source is at `path` (a file, or a package directory).
+        """
+        if path.name == "__init__.py":
+            path = path.parent
+        if path.is_file():
+            return {name}
+        if not path.is_dir():
+            LOG.info("Editable %s points to missing %s", name, path)
+            return set()
+        ret = {name}
+        for rel in self._scan_tree(path):
+            parts = rel[:-3].split("/")
+            if parts[-1] == "__init__":
+                parts.pop()
+            ret.add(".".join([name] + parts))
+        return ret
+
+    def path_entry(
+        self, directory: Path, top_level: Optional[Collection[str]] = None
+    ) -> Set[str]:
+        """
+        Returns the dotted names importable from a `sys.path` directory, only
+        counting the given top-level names if there are any.
+        """
+        ret: Set[str] = set()
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError as e:
+            LOG.info("Can't scan %s: %s", directory, e)
+            return ret
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".py"):
+                name = entry.name[:-3]
+            elif entry.is_dir() and Path(entry.path, "__init__.py").exists():
+                name = entry.name
+            else:
+                continue
+            if not name.isidentifier() or (top_level and name not in top_level):
+                continue
+            ret |= self.modules(name, Path(entry.path))
+        return ret
+
+
+def editable_packages(
+    distinfo_dir: Path, record_filenames: Collection[str], scanner: SourceScanner
+) -> Set[str]:
+    """
+    Returns the dotted names provided by an editable install, or an empty set
+    if it isn't one.
+    """
+    site_dir = distinfo_dir.parent
+    top_level = read_top_level(distinfo_dir)
+    ret: Set[str] = set()
+    for filename in record_filenames:
+        if not filename.endswith(".pth") or "/" in filename:
+            continue
+        dirs, imports = read_pth(site_dir / filename)
+        for d in dirs:
+            ret |= scanner.path_entry(d, top_level)
+        for module in imports:
+            hook = site_dir / f"{module}.py"
+            if hook.is_file():
+                for name, path in read_finder_mapping(hook).items():
+                    ret |= scanner.modules(name, path)
+
+    if not ret and (source_dir := read_direct_url(distinfo_dir)):
+        LOG.info("%s: falling back to scanning %s", distinfo_dir.name, source_dir)
+        if (source_dir / "src").is_dir():
+            source_dir = source_dir / "src"
+        ret |= scanner.path_entry(source_dir, top_level)
+    return ret
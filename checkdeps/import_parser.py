@@ -1,10 +1,20 @@
 import ast
+import multiprocessing
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
 from pathlib import Path
-from typing import Set
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 
 def get_imports(path: Path) -> Set[str]:
-    tree = ast.parse(path.read_bytes())  # TODO can we get away with this
+    return get_imports_from_source(path.read_bytes())
+
+
+def get_imports_from_source(source: bytes) -> Set[str]:
+    tree = ast.parse(source)  # TODO can we get away with this
     imports: Set[str] = set()
 
     for node in ast.walk(tree):
@@ -16,3 +26,103 @@ def get_imports(path: Path) -> Set[str]:
                 for subnode in node.names:
                     imports.add(f"{node.module}.{subnode.name}")
     return imports
+
+
+@dataclass
+class IsolatedParse:
+    position: int
+    # Sorted, or None if the file couldn't be parsed in time
+    imports: Optional[List[str]]
+    seconds: float
+    error: Optional[str] = None
+
+
+def _isolated_worker(conn: Connection) -> None:
+    conn.send(None)  # Started, so startup doesn't count against the timeout
+    while (path := conn.recv()) is not None:
+        start = time.perf_counter()
+        try:
+            imports = sorted(get_imports(path))
+        except Exception as e:
+            conn.send((None, time.perf_counter() - start, e))
+        else:
+            conn.send((imports, time.perf_counter() - start, None))
+
+
+def iter_imports_isolated(
+    paths: Sequence[Path], timeout: float, jobs: int = 1
+) -> Iterator[IsolatedParse]:
+    """
+    Parses each file in one of `jobs` child processes, killing (and replacing)
+    the child if a file takes longer than `timeout` seconds, so one pathological
+    file can't stall the run or take the parent's memory with it.
+
+    Yields results in completion order.  Exceptions other than timeouts and
+    crashed children are reraised, the same as parsing in-process.
+    """
+    todo: Deque[Tuple[int, Path]] = deque(enumerate(paths))
+    idle: List[Tuple[BaseProcess, Connection]] = []
+    # conn -> (process, position, start, deadline)
+    busy: Dict[Connection, Tuple[BaseProcess, int, float, float]] = {}
+    ctx = multiprocessing.get_context()
+
+    def start_worker() -> Tuple[BaseProcess, Connection]:
+        parent, child = ctx.Pipe()
+        proc = ctx.Process(target=_isolated_worker, args=(child,), daemon=True)
+        proc.start()
+        child.close()
+        parent.recv()
+        return proc, parent
+
+    def kill(proc: BaseProcess, conn: Connection) -> None:
+        proc.kill()
+        proc.join()
+        conn.close()
+
+    try:
+        while todo or busy:
+            while todo and len(busy) < jobs:
+                proc, conn = idle.pop() if idle else start_worker()
+                position, path = todo.popleft()
+                conn.send(path)
+                now = time.perf_counter()
+                busy[conn] = (proc, position, now, now + timeout)
+
+            next_deadline = min(deadline for _, _, _, deadline in busy.values())
+            ready = wait(list(busy), max(0.0, next_deadline - time.perf_counter()))
+            now = time.perf_counter()
+            for conn in list(busy):
+                proc, position, start, deadline = busy[conn]
+                if conn in ready:
+                    del busy[conn]
+                    try:
+                        imports, seconds, exc = conn.recv()
+                    except EOFError:
+                        kill(proc, conn)
+                        yield IsolatedParse(
+                            position,
+                            None,
+                            now - start,
+                            f"parser exited with code {proc.exitcode}",
+                        )
+                        continue
+                    idle.append((proc, conn))
+                    if exc is not None:
+                        raise exc
+                    yield IsolatedParse(position, imports, seconds)
+                elif now >= deadline:
+                    del busy[conn]
+                    kill(proc, conn)
+                    yield IsolatedParse(
+                        position,
+                        None,
+                        now - start,
+                        f"parse took longer than {timeout:g}s",
+                    )
+    finally:
+        for proc, conn in idle:
+            conn.send(None)
+            conn.close()
+            proc.join()
+        for conn, (proc, _, _, _) in busy.items():
+            kill(proc, conn)
@@ -11,7 +11,7 @@ import logging
 # type option
 from configparser import ConfigParser, NoOptionError, NoSectionError
 from pathlib import Path
-from typing import Dict, Generator, Sequence
+from typing import Dict, Generator, Iterable, Optional, Sequence, Set
 
 try:
     from tomllib import loads as toml_loads
@@ -39,6 +39,26 @@ def get_metadata_requirement_names(target_dir: Path) -> Dict[str, Sequence[str]]
     return {k: set(canonicalize_name(i.name) for i in v) for k, v in md.items()}  # type: ignore
 
 
+def requirement_names_for_python(
+    reqs: Iterable[Requirement], python_version: Optional[str] = None
+) -> Set[str]:
+    """
+    Returns the canonical names of requirements whose markers apply to the given
+    "X.Y" python version, or all of them if it's None.
+    """
+    env: Optional[Dict[str, str]] = None
+    if python_version:
+        env = {
+            "python_version": python_version,
+            "python_full_version": f"{python_version}.0",
+        }
+    return {
+        canonicalize_name(r.name)
+        for r in reqs
+        if env is None or r.marker is None or r.marker.evaluate(env)
+    }
+
+
 def get_metadata_requirements(target_dir: Path) -> Dict[str, Sequence[Requirement]]:
     # TODO do these merge?
 
@@ -0,0 +1,160 @@
+"""
+An on-disk form of `DistSet.provided_names` that worker processes can open with
+`mmap` instead of having the whole dict pickled to them.
+
+Opening is constant-time regardless of the number of installed dists; lookups
+binary search the sorted names and only touch the pages they need.
+
+Layout (all integers are little-endian uint32):
+
+    header       magic, format, number of names, number of providers
+    name_offs    (names + 1) offsets into the names blob
+    name_provs   (names) indexes into the provider table
+    prov_offs    (providers + 1) offsets into the providers blob
+    names blob   utf-8 dotted names, sorted bytewise by `prefix_sort_key`
+    prov blob    utf-8 "Kind<TAB>name" entries
+"""
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from .distinfo_inference import (
+    DistSet,
+    find_providers_sorted,
+    iterparents,
+    prefix_sort_key,
+    provider_key,
+    ProviderKey,
+)
+
+MAGIC = b"CDPI"
+FORMAT = 1
+_HEADER = struct.Struct("<4sIII")
+_U32 = struct.Struct("<I")
+
+
+def write_provider_index(distset: DistSet, path: Path) -> None:
+    providers: Dict[ProviderKey, int] = {}
+    entries: List[Tuple[bytes, int]] = []
+    for name, prov in distset.provided_names.items():
+        key = provider_key(prov)
+        entries.append((name.encode(), providers.setdefault(key, len(providers))))
+    entries.sort(key=lambda e: e[0] + b".")
+
+    name_offs = [0]
+    for name_bytes, _ in entries:
+        name_offs.append(name_offs[-1] + len(name_bytes))
+    prov_blobs = [f"{kind}\t{name}".encode() for kind, name in providers]
+    prov_offs = [0]
+    for blob in prov_blobs:
+        prov_offs.append(prov_offs[-1] + len(blob))
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT, len(entries), len(providers)))
+        f.write(struct.pack(f"<{len(name_offs)}I", *name_offs))
+        f.write(struct.pack(f"<{len(entries)}I", *(p for _, p in entries)))
+        f.write(struct.pack(f"<{len(prov_offs)}I", *prov_offs))
+        f.write(b"".join(n for n, _ in entries))
+        f.write(b"".join(prov_blobs))
+    os.replace(tmp, path)
+
+
+class ProviderIndex:
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, fmt, self.num_names, self.num_providers = _HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != MAGIC or fmt != FORMAT:
+            self._mm.close()
+            raise ValueError(f"{path} is not a provider index this version can read")
+
+        self._name_offs = _HEADER.size
+        self._name_provs = self._name_offs + 4 * (self.num_names + 1)
+        self._prov_offs = self._name_provs + 4 * self.num_names
+        self._names = self._prov_offs + 4 * (self.num_providers + 1)
+        self._provs = self._names + self._u32(self._name_offs, self.num_names)
+        self._provider_cache: Dict[int, ProviderKey] = {}
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def _u32(self, base: int, i: int) -> int:
+        return int(_U32.unpack_from(self._mm, base + 4 * i)[0])
+
+    def _name(self, i: int) -> bytes:
+        start = self._u32(self._name_offs, i)
+        end = self._u32(self._name_offs, i + 1)
+        return self._mm[self._names + start : self._names + end]
+
+    def _provider(self, i: int) -> ProviderKey:
+        if i not in self._provider_cache:
+            start = self._u32(self._prov_offs, i)
+            end = self._u32(self._prov_offs, i + 1)
+            kind, name = (
+                self._mm[self._provs + start : self._provs + end].decode().split("\t")
+            )
+            self._provider_cache[i] = (kind, name)
+        return self._provider_cache[i]
+
+    def _search(self, name: str) -> int:
+        """
+        Returns the position of the first name that doesn't sort before the
+        given one.
+        """
+        key = prefix_sort_key(name).encode()
+        lo, hi = 0, self.num_names
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name(mid) + b"." < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _entry(self, i: int) -> Tuple[str, ProviderKey]:
+        return self._name(i).decode(), self._provider(self._u32(self._name_provs, i))
+
+    def get(self, name: str) -> Optional[ProviderKey]:
+        i = self._search(name)
+        if i < self.num_names and self._name(i) == name.encode():
+            return self._provider(self._u32(self._name_provs, i))
+        return None
+
+    def find_provider(self, dotted_name: str) -> Optional[ProviderKey]:
+        """
+        Same as `DistSet.find_provider`, but returns a `ProviderKey`.
+        """
+        for possibility in iterparents(dotted_name + "."):
+            if (key := self.get(possibility)) is not None:
+                return key
+        return None
+
+    def find_providers(
+        self, dotted_names: Sequence[str]
+    ) -> List[Tuple[str, Optional[ProviderKey]]]:
+        """
+        Same as `find_provider` for many names, which must be sorted by
+        `prefix_sort_key`.  Only the part of the index from the first name
+        onward is read, so callers can split a sorted list into ranges.
+        """
+        if not dotted_names:
+            return []
+        first = dotted_names[0]
+        parents = [
+            (p, key) for p in reversed(list(iterparents(first))) if (key := self.get(p))
+        ]
+        table = (self._entry(i) for i in range(self._search(first), self.num_names))
+        return list(find_providers_sorted(dotted_names, table, parents))
+
+    def __iter__(self) -> Iterator[Tuple[str, ProviderKey]]:
+        """
+        Yields (name, provider) sorted by `prefix_sort_key`.
+        """
+        for i in range(self.num_names):
+            yield self._entry(i)
@@ -0,0 +1,105 @@
+"""
+Machine-readable reports, written by `checkdeps --report` and combined by
+`checkdeps merge`.
+"""
+
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from . import __version__
+
+# 2 added used_projects, declared_projects and chains
+REPORT_FORMAT = 2
+
+# Finding kinds
+MISSING = "missing"  # installed, but not in requirements
+NAMESPACE = "namespace"  # only a namespace package provides it
+NOTHING = "nothing"  # nothing installed provides it
+
+
+@dataclass(frozen=True, order=True)
+class Finding:
+    # Position of the file in the full (unsharded) walk, for stable output order
+    index: int
+    path: str
+    name: str
+    kind: str
+    provider: Optional[str] = None
+    # Only set when the finding doesn't apply to every --python-versions target
+    python_versions: Tuple[str, ...] = ()
+
+
+@dataclass
+class Report:
+    shard: int = 1
+    total: int = 1
+    findings: List[Finding] = field(default_factory=list)
+    missing_projects: Set[str] = field(default_factory=set)
+    # For computing unused requirements across shards
+    used_projects: Set[str] = field(default_factory=set)
+    declared_projects: Set[str] = field(default_factory=set)
+    # Shortest chain from a declared requirement to each missing project
+    chains: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def write_report(path: Path, report: Report) -> None:
+    path.write_text(
+        json.dumps(
+            {
+                "format": REPORT_FORMAT,
+                "version": __version__,
+                "shard": [report.shard, report.total],
+                "findings": [asdict(f) for f in report.findings],
+                "missing_projects": sorted(report.missing_projects),
+                "used_projects": sorted(report.used_projects),
+                "declared_projects": sorted(report.declared_projects),
+                "chains": report.chains,
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+
+
+def read_report(path: Path) -> Report:
+    data = json.loads(path.read_text())
+    if data.get("format") != REPORT_FORMAT:
+        raise ValueError(f"{path} has unsupported report format {data.get('format')}")
+    shard, total = data["shard"]
+    return Report(
+        shard=shard,
+        total=total,
+        findings=[
+            Finding(**{**f, "python_versions": tuple(f.get("python_versions", ()))})
+            for f in data["findings"]
+        ],
+        missing_projects=set(data["missing_projects"]),
+        used_projects=set(data["used_projects"]),
+        declared_projects=set(data["declared_projects"]),
+        chains=data["chains"],
+    )
+
+
+def merge_reports(reports: Sequence[Report]) -> Report:
+    """
+    Combines one report per shard into the report a single unsharded run
+    would have produced.
+    """
+    if not reports:
+        raise ValueError("No reports to merge")
+    total = reports[0].total
+    shards = sorted(r.shard for r in reports)
+    if any(r.total != total for r in reports) or shards != list(range(1, total + 1)):
+        raise ValueError(f"Expected exactly shards 1..{total}, got {shards}")
+
+    merged = Report()
+    for r in reports:
+        merged.findings.extend(r.findings)
+        merged.missing_projects |= r.missing_projects
+        merged.used_projects |= r.used_projects
+        merged.declared_projects |= r.declared_projects
+        merged.chains.update(r.chains)
+    merged.findings.sort()
+    return merged
@@ -1,26 +1,147 @@
 # This is an especially simple version of requirements parsing; we do the simple
 # thing here to avoid extra deps or fragile APIs, at the expense of missing some
 # deps and false-positives.
+#
+# `-r` and `-c` includes are followed (relative to the including file, like pip
+# does), each file is read and parsed at most once per call, and names are
+# extracted with a regex unless the full `Requirement` (e.g. for its markers) is
+# asked for.  Other option lines, like `--index-url`, are ignored.
 
+import logging
+import re
+from dataclasses import dataclass, field
 from glob import glob
 from pathlib import Path
-from typing import Iterator
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from packaging.requirements import Requirement
+from packaging.requirements import InvalidRequirement, Requirement
 from packaging.utils import canonicalize_name
 
+LOG = logging.getLogger(__name__)
+
+# A comment is a # at the start of a line or after whitespace, so that URL
+# fragments like #egg=foo survive.
+_COMMENT_RE = re.compile(r"(^|\s)#.*$")
+# Per-requirement options like --hash come after the specifier
+_TRAILING_OPTIONS_RE = re.compile(r"\s+--?[A-Za-z].*$")
+_NAME_RE = re.compile(r"[A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?")
+_EGG_RE = re.compile(r"#egg=([A-Za-z0-9][A-Za-z0-9._-]*)")
+_LONG_OPTION_RE = re.compile(r"(--[A-Za-z-]+)(?:\s*=\s*|\s+|$)(.*)$")
+
+_INCLUDE_OPTIONS = {"-r", "--requirement"}
+_CONSTRAINT_OPTIONS = {"-c", "--constraint"}
+_EDITABLE_OPTIONS = {"-e", "--editable"}
+
 # These all have iter- prefixes because I expect a more public api to pick a
 # couple and return sets instead.
 
 
-def _iter_simple_requirements(path: Path) -> Iterator[Requirement]:
-    for line in path.read_text().splitlines():
-        line = line.split("#", 1)[0].strip()
-        if not line:
+@dataclass
+class ParsedRequirementsFile:
+    # Requirement specifiers, with comments and options removed
+    lines: List[str] = field(default_factory=list)
+    # (path, is_constraint) for each -r or -c
+    includes: List[Tuple[Path, bool]] = field(default_factory=list)
+
+
+def _iter_logical_lines(text: str) -> Iterator[str]:
+    buf = ""
+    for line in text.splitlines():
+        line = _COMMENT_RE.sub("", line)
+        if line.endswith("\\"):
+            buf += line[:-1]
+            continue
+        line = (buf + line).strip()
+        buf = ""
+        if line:
+            yield line
+    if buf.strip():
+        yield buf.strip()
+
+
+def parse_requirements_file(path: Path) -> ParsedRequirementsFile:
+    parsed = ParsedRequirementsFile()
+    for line in _iter_logical_lines(path.read_text()):
+        if not line.startswith("-"):
+            if m := _EGG_RE.search(line):
+                if "://" in line.split("@", 1)[0]:
+                    # A bare URL, only the fragment tells us the name
+                    parsed.lines.append(m.group(1))
+                    continue
+            parsed.lines.append(_TRAILING_OPTIONS_RE.sub("", line))
             continue
 
-        # N.b. Requirement does not canonicalize its name
-        yield Requirement(line)
+        if m := _LONG_OPTION_RE.match(line):
+            option, value = m.group(1), m.group(2).strip()
+        else:
+            # Short options can be attached, like -rbase.txt
+            option, value = line[:2], line[2:].strip()
+
+        if option in _INCLUDE_OPTIONS or option in _CONSTRAINT_OPTIONS:
+            if "://" in value:
+                LOG.warning("%s: not following remote include %s", path, value)
+            elif value:
+                parsed.includes.append(
+                    (path.parent / value, option in _CONSTRAINT_OPTIONS)
+                )
+        elif option in _EDITABLE_OPTIONS:
+            if m := _EGG_RE.search(value):
+                parsed.lines.append(m.group(1))
+            else:
+                LOG.info("%s: can't tell the name of editable %s", path, value)
+        else:
+            LOG.debug("%s: ignoring option line %r", path, line)
+    return parsed
+
+
+def iter_requirement_lines(
+    paths: Iterable[Path],
+    memo: Optional[Dict[Path, ParsedRequirementsFile]] = None,
+) -> Iterator[str]:
+    """
+    Yields the requirement specifiers from the given files and everything they
+    `-r` include, visiting each file once.  Constraint (`-c`) files are followed
+    for cycle checking, but don't contribute requirements.
+    """
+    if memo is None:
+        memo = {}
+    done: Set[Tuple[Path, bool]] = set()
+
+    def visit(path: Path, constraint: bool, stack: List[Path]) -> Iterator[str]:
+        path = path.resolve()
+        if path in stack:
+            LOG.warning(
+                "Cycle in requirements includes: %s",
+                " -> ".join(p.name for p in stack + [path]),
+            )
+            return
+        if (path, constraint) in done:
+            return
+        done.add((path, constraint))
+
+        if path not in memo:
+            try:
+                memo[path] = parse_requirements_file(path)
+            except OSError as e:
+                LOG.warning("Can't read requirements %s: %s", path, e)
+                memo[path] = ParsedRequirementsFile()
+        parsed = memo[path]
+        if not constraint:
+            yield from parsed.lines
+        for include, is_constraint in parsed.includes:
+            yield from visit(include, constraint or is_constraint, stack + [path])
+
+    for path in paths:
+        yield from visit(path, False, [])
+
+
+def _name(line: str) -> Optional[str]:
+    # Like `Requirement`, a bare URL or path has no name (those with #egg= were
+    # already replaced by it)
+    if line.startswith((".", "/")) or "://" in line.split("@", 1)[0]:
+        return None
+    m = _NAME_RE.match(line)
+    return canonicalize_name(m.group(0)) if m else None
 
 
 def iter_requirement_names(path: Path) -> Iterator[str]:
@@ -29,16 +150,34 @@ def iter_requirement_names(path: Path) -> Iterator[str]:
     """
     # TODO support, or document non-support, for git references
 
-    for req in _iter_simple_requirements(path):
-        yield canonicalize_name(req.name)
+    for line in iter_requirement_lines([path]):
+        if name := _name(line):
+            yield name
 
 
-def iter_glob_all_requirement_names(
-    comma_separated_patterns: str, root_dir: Path
-) -> Iterator[str]:
+def _iter_glob(comma_separated_patterns: str, root_dir: Path) -> Iterator[Path]:
     for pattern in comma_separated_patterns.split(","):
         if pattern:
             for filename in sorted(glob(pattern, root_dir=root_dir)):
                 # We can't just use Path.glob because you mgiht pass
                 # 'reqs/*.txt' and this is considered a non-relative pattern.
-                yield from iter_requirement_names(root_dir / filename)
+                yield root_dir / filename
+
+
+def iter_glob_all_requirements(
+    comma_separated_patterns: str, root_dir: Path
+) -> Iterator[Requirement]:
+    for line in iter_requirement_lines(_iter_glob(comma_separated_patterns, root_dir)):
+        try:
+            # N.b. Requirement does not canonicalize its name
+            yield Requirement(line)
+        except InvalidRequirement as e:
+            LOG.info("Skipping unparseable requirement %r: %s", line, e)
+
+
+def iter_glob_all_requirement_names(
+    comma_separated_patterns: str, root_dir: Path
+) -> Iterator[str]:
+    for line in iter_requirement_lines(_iter_glob(comma_separated_patterns, root_dir)):
+        if name := _name(line):
+            yield name
@@ -0,0 +1,272 @@
+"""
+Turns files into per-target (import, provider) verdicts in two phases:
+
+1. Collection: every file's imports are gathered (from the result cache, or by
+   parsing), along with the distinct dotted names that need resolving.
+2. Resolution: each distinct name is resolved once per target, so the cost is
+   proportional to the number of distinct names rather than the number of
+   imports.
+
+Parsing is timed per file, and files can be skipped for being too large or, by
+parsing in killable child processes, for taking too long.  Skipped files are
+recorded rather than dropped silently.
+
+Either phase can run in a pool of worker processes.  Workers don't receive the
+`DistSet`s; each target's provided names are written once to a `ProviderIndex`
+file that workers `mmap`, and each worker resolves a contiguous range of the
+sorted names in one merge-style pass over the index.
+"""
+
+import tempfile
+import time
+from contextlib import ExitStack
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple
+
+from .cache import CacheLookup, ResultCache, Verdict
+from .distinfo_inference import BaseProvider, DistSet, prefix_sort_key, ProviderKey
+from .import_parser import (
+    get_imports,
+    get_imports_from_source,
+    iter_imports_isolated,
+)
+from .provider_index import ProviderIndex, write_provider_index
+
+# Per worker process
+_WORKER_INDEXES: Dict[str, ProviderIndex] = {}
+
+
+@dataclass
+class Collection:
+    # Per file; None without a cache
+    lookups: List[Optional[CacheLookup]] = field(default_factory=list)
+    # Sorted imports, per file
+    imports: List[List[str]] = field(default_factory=list)
+    # Distinct dotted names that need resolving
+    names: Set[str] = field(default_factory=set)
+    # Positions of files whose imports are unknown
+    skipped: Set[int] = field(default_factory=set)
+
+
+@dataclass
+class ParseStats:
+    # Seconds spent parsing, for each file that had to be parsed
+    times: Dict[Path, float] = field(default_factory=dict)
+    # Files that weren't checked, and why
+    skipped: Dict[Path, str] = field(default_factory=dict)
+
+
+def _init_worker(index_paths: Mapping[str, Path]) -> None:
+    for target, path in index_paths.items():
+        _WORKER_INDEXES[target] = ProviderIndex(path)
+
+
+def _timed_parse(path: Path, source: Optional[bytes] = None) -> Tuple[List[str], float]:
+    start = time.perf_counter()
+    if source is None:
+        imports = get_imports(path)
+    else:
+        imports = get_imports_from_source(source)
+    return sorted(imports), time.perf_counter() - start
+
+
+def _worker_resolve(
+    item: Tuple[str, Sequence[str]],
+) -> List[Tuple[str, Optional[ProviderKey]]]:
+    target, names = item
+    return _WORKER_INDEXES[target].find_providers(names)
+
+
+def collect(
+    paths: Sequence[Path],
+    num_targets: int,
+    cache: Optional[ResultCache] = None,
+    executor: Optional[Executor] = None,
+    *,
+    skip: Mapping[int, str] = {},
+    parse_timeout: Optional[float] = None,
+    jobs: int = 1,
+    stats: Optional[ParseStats] = None,
+) -> Collection:
+    """
+    Phase 1: gathers each file's imports, parsing only those the cache doesn't
+    know, and the names that need resolving (skipping files whose verdicts the
+    cache already has for every target).
+
+    Files in `skip` aren't read at all; with `parse_timeout`, files are parsed
+    in `jobs` child processes and any that run over are skipped.  Run serially,
+    only one file's contents are held at a time.
+    """
+    if stats is None:
+        stats = ParseStats()
+    ret = Collection()
+    parallel = parse_timeout is not None or executor is not None
+    lookups: Dict[int, CacheLookup] = {}
+    parsed: Dict[int, Tuple[List[str], float]] = {}
+    reasons = dict(skip)
+    if parallel:
+        if cache:
+            for i, path in enumerate(paths):
+                if i not in skip:
+                    lookups[i] = cache.lookup(path)
+                    # Parsed by workers, which read the file themselves
+                    lookups[i].source = None
+        to_parse = [
+            i
+            for i in range(len(paths))
+            if i not in skip and (i not in lookups or lookups[i].imports is None)
+        ]
+    else:
+        to_parse = []
+
+    if parse_timeout is not None and to_parse:
+        for result in iter_imports_isolated(
+            [paths[i] for i in to_parse], parse_timeout, jobs
+        ):
+            i = to_parse[result.position]
+            if result.imports is None:
+                reasons[i] = result.error or "not parsed"
+            else:
+                parsed[i] = (result.imports, result.seconds)
+    elif executor and to_parse:
+        chunksize = max(1, len(to_parse) // 64)
+        parsed = dict(
+            zip(
+                to_parse,
+                executor.map(
+                    _timed_parse, [paths[i] for i in to_parse], chunksize=chunksize
+                ),
+            )
+        )
+
+    for i, path in enumerate(paths):
+        if parallel:
+            lookup = lookups.get(i)
+        else:
+            lookup = cache.lookup(path) if cache and i not in skip else None
+        ret.lookups.append(lookup)
+        if i in reasons:
+            stats.skipped[path] = reasons[i]
+            ret.skipped.add(i)
+            ret.imports.append([])
+            continue
+        if lookup and lookup.imports is not None:
+            imports = lookup.imports
+        else:
+            if i in parsed:
+                imports, seconds = parsed[i]
+            else:
+                imports, seconds = _timed_parse(path, lookup.source if lookup else None)
+                if lookup:
+                    lookup.source = None
+            stats.times[path] = seconds
+        ret.imports.append(imports)
+
+        if lookup and len(lookup.results) == num_targets:
+            continue
+        ret.names.update(imports)
+    return ret
+
+
+def resolve(
+    names: Sequence[str],
+    distsets: Mapping[str, DistSet],
+    executor: Optional[Executor] = None,
+    chunks: int = 1,
+) -> Dict[str, Dict[str, Optional[BaseProvider]]]:
+    """
+    Phase 2: resolves the given names for each target; with an executor, in
+    sorted ranges.
+    """
+    if not executor:
+        # Hash lookups, so this doesn't scale with the size of the venv
+        return {
+            t: {name: ds.find_provider(name) for name in names}
+            for t, ds in distsets.items()
+        }
+
+    ordered = sorted(set(names), key=prefix_sort_key)
+    size = max(1, -(-len(ordered) // chunks))
+    work = [
+        (t, ordered[start : start + size])
+        for t in distsets
+        for start in range(0, len(ordered), size)
+    ]
+    ret: Dict[str, Dict[str, Optional[BaseProvider]]] = {t: {} for t in distsets}
+    for (t, _), resolved in zip(work, executor.map(_worker_resolve, work)):
+        ds = distsets[t]
+        for name, key in resolved:
+            ret[t][name] = ds.from_key(key) if key else None
+    return ret
+
+
+def _start_pool(
+    stack: ExitStack, distsets: Mapping[str, DistSet], jobs: int
+) -> Executor:
+    """
+    Starts a pool of `jobs` workers, each with every target's `ProviderIndex`,
+    that lasts as long as `stack`.
+    """
+    d = stack.enter_context(tempfile.TemporaryDirectory(prefix="checkdeps"))
+    index_paths: Dict[str, Path] = {}
+    for n, (target, distset) in enumerate(distsets.items()):
+        index_paths[target] = Path(d, f"providers{n}.idx")
+        write_provider_index(distset, index_paths[target])
+    return stack.enter_context(
+        ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(index_paths,))
+    )
+
+
+def iter_results(
+    paths: Sequence[Path],
+    distsets: Mapping[str, DistSet],
+    cache: Optional[ResultCache] = None,
+    jobs: int = 1,
+    *,
+    max_file_size: Optional[int] = None,
+    parse_timeout: Optional[float] = None,
+    stats: Optional[ParseStats] = None,
+) -> Iterator[Dict[str, List[Verdict]]]:
+    """
+    Yields the verdicts for each target, for each of the paths in order.  A
+    skipped file (see `ParseStats.skipped`) has no verdicts.
+    """
+    skip: Dict[int, str] = {}
+    if max_file_size is not None:
+        for i, p in enumerate(paths):
+            size = p.stat().st_size
+            if size > max_file_size:
+                skip[i] = f"{size} bytes is over the {max_file_size} byte limit"
+
+    with ExitStack() as stack:
+        exe: Optional[Executor] = None
+        # With a parse timeout, parsing uses its own child processes, so the
+        # pool isn't started until they're done.
+        if jobs > 1 and parse_timeout is None:
+            exe = _start_pool(stack, distsets, jobs)
+
+        collection = collect(
+            paths,
+            len(distsets),
+            cache,
+            exe,
+            skip=skip,
+            parse_timeout=parse_timeout,
+            jobs=jobs,
+            stats=stats,
+        )
+        if jobs > 1 and exe is None:
+            exe = _start_pool(stack, distsets, jobs)
+        resolved = resolve(list(collection.names), distsets, exe, chunks=jobs * 4)
+
+    # Phase 3: per-file verdicts
+    for n, (lookup, imports) in enumerate(zip(collection.lookups, collection.imports)):
+        results = dict(lookup.results) if lookup else {}
+        for t in distsets:
+            if t not in results:
+                results[t] = [(i, resolved[t][i]) for i in imports]
+        if cache and lookup and n not in collection.skipped:
+            cache.store(lookup, imports, results)
+        yield results
@@ -0,0 +1,65 @@
+"""
+Deterministic partitioning of the walked files, so a check can be split across
+several machines and then combined with `checkdeps merge`.
+
+Every shard walks the same tree and computes the same assignment; files are
+placed largest-first onto the least loaded shard, with a stable hash of the
+project-relative path breaking ties so the result doesn't depend on walk order.
+"""
+
+import hashlib
+import heapq
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parses a 1-based "K/N" shard spec.
+    """
+    try:
+        k, n = (int(x) for x in value.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like K/N, got {value!r}") from None
+    if not (1 <= k <= n):
+        raise ValueError(f"Shard must satisfy 1 <= K <= N, got {value!r}")
+    return k, n
+
+
+def _relative_name(path: Path, root: Path) -> str:
+    resolved = path.resolve()
+    try:
+        return resolved.relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+
+def _stable_hash(name: str) -> int:
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big")
+
+
+def sort_paths(paths: Iterable[Path], root: Path) -> List[Path]:
+    """
+    Returns the paths in project-relative name order, which (unlike walk
+    order) is the same on every machine.
+    """
+    return sorted(paths, key=lambda p: _relative_name(p, root))
+
+
+def assign_shards(paths: Iterable[Path], root: Path, total: int) -> Dict[Path, int]:
+    """
+    Returns the 1-based shard for each path, balanced by file size.
+    """
+    items: List[Tuple[int, int, str, Path]] = []
+    for path in paths:
+        name = _relative_name(path, root)
+        items.append((-path.stat().st_size, _stable_hash(name), name, path))
+    items.sort(key=lambda t: t[:3])
+
+    loads = [(0, k) for k in range(1, total + 1)]
+    ret: Dict[Path, int] = {}
+    for neg_size, _, _, path in items:
+        load, k = heapq.heappop(loads)
+        ret[path] = k
+        heapq.heappush(loads, (load - neg_size, k))
+    return ret
@@ -1,13 +1,27 @@
+from .cache import ResultCacheTest
 from .cli import CliTest
+from .depgraph import DependencyGraphTest
 from .distinfo import IterDistinfoDirsTest
 from .distinfo_inference import DistinfoInferenceTest
+from .editable import EditableTest
 from .import_parser import ImportParserTest
 from .metadata import MetadataRequirementsTest
+from .provider_index import ProviderIndexTest
+from .requirements import RequirementsTest
+from .shard import ShardTest
+from .walk import WalkTest
 
 __all__ = [
     "DistinfoInferenceTest",
     "IterDistinfoDirsTest",
     "ImportParserTest",
     "CliTest",
+    "DependencyGraphTest",
+    "EditableTest",
+    "ResultCacheTest",
     "MetadataRequirementsTest",
+    "ProviderIndexTest",
+    "RequirementsTest",
+    "ShardTest",
+    "WalkTest",
 ]
@@ -0,0 +1,194 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List, Set
+
+from ..cache import ResultCache, Verdict
+from ..distinfo_inference import Dist, DistSet, Stdlib
+from ..resolve import collect, iter_results
+
+
+def _distset(*dists: Dist) -> DistSet:
+    ds = DistSet()
+    for dist in dists:
+        ds.add_dist(dist)
+    ds.add_explicit("sys", Stdlib("sys"))
+    return ds
+
+
+def _check(cache: ResultCache, path: Path) -> Dict[str, List[Verdict]]:
+    (results,) = iter_results([path], cache.distsets, cache)
+    return results
+
+
+FOO = Dist("foo", Path(), frozenset({"foo"}), frozenset())
+BAR = Dist("bar", Path(), frozenset({"bar"}), frozenset())
+BAZ = Dist("baz", Path(), frozenset({"baz"}), frozenset())
+
+
+class ResultCacheTest(unittest.TestCase):
+    def test_reuse(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "a.py").write_text("import sys\nimport foo.x\nimport missing\n")
+
+            cache = ResultCache(pd / "cache", {"": _distset(FOO)}, {"": set()})
+            verdicts = _check(cache, pd / "a.py")[""]
+            self.assertEqual(
+                [("foo.x", FOO), ("missing", None), ("sys", Stdlib("sys"))],
+                verdicts,
+            )
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+            cache.save()
+
+            # Nothing changed
+            cache = ResultCache(pd / "cache", {"": _distset(FOO)}, {"": set()})
+            self.assertEqual(verdicts, _check(cache, pd / "a.py")[""])
+            self.assertEqual((1, 0), (cache.hits, cache.misses))
+            cache.save()
+
+            # Unrelated dist installed
+            cache = ResultCache(pd / "cache", {"": _distset(FOO, BAR)}, {"": set()})
+            self.assertEqual(verdicts, _check(cache, pd / "a.py")[""])
+            self.assertEqual((1, 0), (cache.hits, cache.misses))
+            cache.save()
+
+            # Related dist installed
+            missing = Dist("missing", Path(), frozenset({"missing"}), frozenset())
+            cache = ResultCache(pd / "cache", {"": _distset(FOO, missing)}, {"": set()})
+            self.assertEqual(
+                [("foo.x", FOO), ("missing", missing), ("sys", Stdlib("sys"))],
+                _check(cache, pd / "a.py")[""],
+            )
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_invalidation(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "a.py").write_text("import foo\n")
+
+            cache = ResultCache(pd / "cache", {"": _distset(FOO, BAZ)}, {"": set()})
+            _check(cache, pd / "a.py")
+            cache.save()
+
+            # Requirements are part of the key
+            cache = ResultCache(pd / "cache", {"": _distset(FOO, BAZ)}, {"": {"foo"}})
+            _check(cache, pd / "a.py")
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+            cache.save()
+
+            # Content change
+            (pd / "a.py").write_text("import baz\n")
+            cache = ResultCache(pd / "cache", {"": _distset(FOO, BAZ)}, {"": {"foo"}})
+            self.assertEqual([("baz", BAZ)], _check(cache, pd / "a.py")[""])
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_entry_from_older_run(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "a.py").write_text("import foo\n")
+            (pd / "b.py").write_text("import sys\n")
+
+            cache = ResultCache(pd / "cache", {"": _distset()}, {"": set()})
+            self.assertEqual([("foo", None)], _check(cache, pd / "a.py")[""])
+            cache.save()
+
+            # a.py isn't visited, so its entry is saved as-is
+            cache = ResultCache(pd / "cache", {"": _distset(FOO)}, {"": set()})
+            _check(cache, pd / "b.py")
+            cache.save()
+
+            cache = ResultCache(pd / "cache", {"": _distset(FOO)}, {"": set()})
+            self.assertEqual([("foo", FOO)], _check(cache, pd / "a.py")[""])
+            self.assertEqual((0, 1), (cache.hits, cache.misses))
+
+    def test_corrupt(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "cache").mkdir()
+            (pd / "cache" / "checkdeps-results.json").write_text("{")
+            (pd / "a.py").write_text("import foo\n")
+            cache = ResultCache(pd / "cache", {"": _distset(FOO)}, {"": set()})
+            self.assertEqual([("foo", FOO)], _check(cache, pd / "a.py")[""])
+            cache.save()
+
+            # A well-formed file with bad entries; each is just a miss
+            entries = json.loads((pd / "cache" / "checkdeps-results.json").read_text())
+            good = entries["entries"][(pd / "a.py").absolute().as_posix()]
+            bad: Any
+            for bad in (
+                {k: v for k, v in good.items() if k != "digest"},
+                {**good, "imports": "foo"},
+                {**good, "results": {"": {"verdicts": []}}},
+                {**good, "results": {"": "nope"}},
+                [],
+            ):
+                entries["entries"][(pd / "a.py").absolute().as_posix()] = bad
+                (pd / "cache" / "checkdeps-results.json").write_text(
+                    json.dumps(entries)
+                )
+                cache = ResultCache(pd / "cache", {"": _distset(FOO)}, {"": set()})
+                self.assertEqual([("foo", FOO)], _check(cache, pd / "a.py")[""])
+                self.assertEqual((0, 1), (cache.hits, cache.misses), bad)
+
+    def test_targets(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "a.py").write_text("import foo\nimport tomllib\n")
+            old = _distset(FOO)
+            new = _distset(FOO)
+            new.add_explicit("tomllib", Stdlib("tomllib"))
+            distsets = {"3.8": old, "3.11": new}
+            names = {"3.8": {"foo"}, "3.11": {"foo"}}
+
+            cache = ResultCache(pd / "cache", distsets, names)
+            expected = {
+                "3.8": [("foo", FOO), ("tomllib", None)],
+                "3.11": [("foo", FOO), ("tomllib", Stdlib("tomllib"))],
+            }
+            self.assertEqual(expected, _check(cache, pd / "a.py"))
+            self.assertEqual((0, 2), (cache.hits, cache.misses))
+            cache.save()
+
+            cache = ResultCache(pd / "cache", distsets, names)
+            self.assertEqual(expected, _check(cache, pd / "a.py"))
+            self.assertEqual((2, 0), (cache.hits, cache.misses))
+
+    def test_jobs(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            paths = [pd / "a.py", pd / "b.py"]
+            paths[0].write_text("import foo\n")
+            paths[1].write_text("import bar\n")
+            distsets = {"": _distset(FOO, BAR)}
+            names: Dict[str, Set[str]] = {"": set()}
+
+            cache = ResultCache(pd / "cache", distsets, names)
+            expected = [{"": [("foo", FOO)]}, {"": [("bar", BAR)]}]
+            self.assertEqual(expected, list(iter_results(paths, distsets, cache, 2)))
+            self.assertEqual((0, 2), (cache.hits, cache.misses))
+            cache.save()
+
+            paths[1].write_text("import baz\n")
+            cache = ResultCache(pd / "cache", distsets, names)
+            self.assertEqual(
+                [{"": [("foo", FOO)]}, {"": [("baz", None)]}],
+                list(iter_results(paths, distsets, cache, 2)),
+            )
+            self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_collect(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            paths = [pd / "a.py", pd / "b.py"]
+            paths[0].write_text("import foo\nimport sys\n")
+            paths[1].write_text("import foo\n")
+            cache = ResultCache(pd / "cache", {"": _distset(FOO)}, {"": set()})
+
+            collection = collect(paths, 1, cache)
+            self.assertEqual({"foo", "sys"}, collection.names)
+            # Nothing keeps the contents once they're parsed
+            self.assertEqual(
+                [None, None], [lookup.source for lookup in collection.lookups if lookup]
+            )
@@ -3,7 +3,9 @@ import tempfile
 
 import unittest
 from pathlib import Path
+from unittest import mock
 
+import trailrunner
 from click.testing import CliRunner
 
 from ..cli import main
@@ -124,3 +126,240 @@ from baz import fromimport
 """,
                 output,
             )
+
+    def test_shard_merge(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d).resolve()
+            (pd / ".git").mkdir()  # for automatic project_root
+            (pd / "mod").mkdir()
+            (pd / "mod" / "a.py").write_text("import click\nimport bar\n")
+            (pd / "mod" / "b.py").write_text("import sys\nfrom baz import x\n")
+            (pd / "mod" / "c.py").write_text("import click\n")
+            (pd / "requirements.txt").write_text("")
+
+            runner = CliRunner()
+            args = ["--requirements=requirements.txt", "--no-metadata"]
+            single = runner.invoke(main, args + [d])
+            self.assertEqual(1, single.exit_code)
+
+            reports = []
+            walked = list(trailrunner.walk(pd / "mod"))
+            for k in (1, 2, 3):
+                report = pd / f"report{k}.json"
+                # Each machine can list directories in its own order
+                order = walked[::-1] if k == 2 else walked
+                with mock.patch("trailrunner.walk", return_value=iter(order)):
+                    result = runner.invoke(
+                        main, args + [f"--shard={k}/3", f"--report={report}", d]
+                    )
+                # Exits 1 only for missing requirements, never by crashing
+                self.assertIn(result.exit_code, (0, 1), result.output)
+                if result.exception is not None:
+                    self.assertIsInstance(result.exception, SystemExit)
+                self.assertTrue(report.exists())
+                reports.append(str(report))
+
+            merged = runner.invoke(main, ["merge"] + reports)
+            self.assertEqual(1, merged.exit_code)
+            self.assertEqual(single.output, merged.output)
+
+            merged = runner.invoke(main, ["merge", "--missing-projects-only"] + reports)
+            self.assertEqual(
+                MOD_RE.sub("[TEMPDIR]/mod", merged.output),
+                """\
+[TEMPDIR]/mod/a.py uses bar but there is nothing installed to provide it
+[TEMPDIR]/mod/b.py uses baz.x but there is nothing installed to provide it
+['click']
+""",
+            )
+
+            result = runner.invoke(main, ["merge"] + reports[:2])
+            self.assertEqual(1, result.exit_code)
+            self.assertIn("Expected exactly shards 1..3", result.output)
+
+            result = runner.invoke(main, args + ["--shard=4/3", d])
+            self.assertEqual(2, result.exit_code)
+
+            # From a build before used/declared projects were recorded
+            old = pd / "old.json"
+            old.write_text(
+                '{"format": 1, "shard": [1, 1], "findings": [], "missing_projects": []}'
+            )
+            result = runner.invoke(main, ["merge", str(old)])
+            self.assertEqual(1, result.exit_code)
+            self.assertIn("has unsupported report format 1", result.output)
+
+    def test_python_versions(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d).resolve()
+            (pd / "mod").mkdir()
+            (pd / "mod" / "foo.py").write_text(
+                """\
+import sys
+import tomllib
+import click
+"""
+            )
+            (pd / "pyproject.toml").write_text(
+                "[project]\ndependencies = ['click ; python_version < \"3.12\"']"
+            )
+
+            runner = CliRunner()
+            result = runner.invoke(main, ["--python-versions=3.8,3.11,3.12", d])
+            output = MOD_RE.sub("[TEMPDIR]/mod", result.output)
+            self.assertEqual(
+                """\
+[TEMPDIR]/mod/foo.py uses click but 'click' not in requirements on Python 3.12
+[TEMPDIR]/mod/foo.py uses tomllib but there is nothing installed to provide it on Python 3.8
+""",
+                output,
+            )
+            self.assertEqual(1, result.exit_code)
+
+            # Repeats are ignored
+            result = runner.invoke(
+                main, ["--python-versions=3.11,3.12,3.11", "--details", d]
+            )
+            output = MOD_RE.sub("[TEMPDIR]/mod", result.output)
+            self.assertEqual(
+                """\
+[TEMPDIR]/mod/foo.py:
+  click available from 'click' on Python 3.11
+[TEMPDIR]/mod/foo.py uses click but 'click' not in requirements on Python 3.12
+  sys stdlib
+  tomllib stdlib
+""",
+                output,
+            )
+
+    def test_python_versions_invalid(self) -> None:
+        runner = CliRunner()
+        for value, message in (
+            ("3.99", "Python 3.99 is not known to stdlibs"),
+            ("foo", "'foo' is not a Python version like 3.12"),
+            ("3.8,", "'' is not a Python version like 3.12"),
+        ):
+            result = runner.invoke(main, [f"--python-versions={value}", "."])
+            self.assertEqual(2, result.exit_code, value)
+            self.assertIn(message, result.output)
+
+    def test_unused_requirements(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d).resolve()
+            (pd / ".git").mkdir()  # for automatic project_root
+            (pd / "mod").mkdir()
+            (pd / "mod" / "foo.py").write_text("import sys\n")
+            (pd / "mod" / "bar.py").write_text("import click\n")
+            (pd / "pyproject.toml").write_text(
+                "[project]\ndependencies = ['click', 'packaging', 'not-installed']"
+            )
+
+            runner = CliRunner()
+            result = runner.invoke(main, [d])
+            self.assertEqual("", result.output)
+            self.assertEqual(0, result.exit_code)
+
+            result = runner.invoke(main, ["--unused-requirements", d])
+            self.assertEqual(
+                "'packaging' is in requirements but nothing imports it\n",
+                result.output,
+            )
+            self.assertEqual(1, result.exit_code)
+
+            reports = []
+            for k in (1, 2):
+                report = pd / f"report{k}.json"
+                result = runner.invoke(
+                    main,
+                    [
+                        "--unused-requirements",
+                        f"--shard={k}/2",
+                        f"--report={report}",
+                        d,
+                    ],
+                )
+                self.assertEqual(0, result.exit_code)
+                reports.append(str(report))
+
+            result = runner.invoke(main, ["merge", "--unused-requirements"] + reports)
+            self.assertEqual(
+                "'packaging' is in requirements but nothing imports it\n",
+                result.output,
+            )
+            self.assertEqual(1, result.exit_code)
+
+    def test_chains(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d).resolve()
+            (pd / ".git").mkdir()  # for automatic project_root
+            (pd / "mod").mkdir()
+            (pd / "mod" / "foo.py").write_text("import pathspec\n")
+            (pd / "requirements.txt").write_text("trailrunner\n")
+
+            runner = CliRunner()
+            result = runner.invoke(
+                main, ["--requirements=requirements.txt", "--no-metadata", d]
+            )
+            output = MOD_RE.sub("[TEMPDIR]/mod", result.output)
+            self.assertEqual(
+                """\
+[TEMPDIR]/mod/foo.py uses pathspec but 'pathspec' not in requirements
+'pathspec' is pulled in by trailrunner -> pathspec
+""",
+                output,
+            )
+
+    def test_fast_walk(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d).resolve()
+            (pd / ".git").mkdir()  # for automatic project_root
+            (pd / ".gitignore").write_text("gen_*.py\n")
+            (pd / "mod").mkdir()
+            (pd / "mod" / "foo.py").write_text("import click\n")
+            (pd / "mod" / "gen_foo.py").write_text("import bar\n")
+            (pd / "venv").mkdir()
+            (pd / "venv" / "pyvenv.cfg").write_text("")
+            (pd / "requirements.txt").write_text("click\n")
+
+            runner = CliRunner()
+            result = runner.invoke(
+                main,
+                ["--requirements=requirements.txt", "--no-metadata", "--fast-walk", d],
+            )
+            self.assertEqual(0, result.exit_code)
+            # .git and venv; gen_foo.py
+            self.assertEqual("Walk skipped 2 directories and 1 files\n", result.output)
+
+    def test_parse_budgets(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d).resolve()
+            (pd / ".git").mkdir()  # for automatic project_root
+            (pd / "mod").mkdir()
+            (pd / "mod" / "big.py").write_text("import bar\n" + "x = 1\n" * 100)
+            (pd / "mod" / "foo.py").write_text("import click\n")
+            (pd / "requirements.txt").write_text("click\n")
+
+            runner = CliRunner()
+            result = runner.invoke(
+                main,
+                [
+                    "--requirements=requirements.txt",
+                    "--no-metadata",
+                    "--max-file-size=100",
+                    "--slowest=5",
+                    d,
+                ],
+            )
+            self.assertEqual(0, result.exit_code)
+            # Both go to stderr; unlike .stderr, .output has it on every click
+            # version
+            output = result.output.replace(pd.as_posix(), "[TEMPDIR]")
+            self.assertIn(
+                "warning: [TEMPDIR]/mod/big.py was not checked: "
+                "611 bytes is over the 100 byte limit\n",
+                output,
+            )
+            self.assertRegex(
+                output,
+                r"Slowest files to parse:\n +\d+\.\d{3}s  \[TEMPDIR\]/mod/foo.py\n",
+            )
@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..depgraph import DependencyGraph, read_requires
+
+
+def _dist(pd: Path, name: str, *requires: str) -> Path:
+    d = pd / f"{name}-1.0.dist-info"
+    d.mkdir()
+    (d / "METADATA").write_text(
+        f"Metadata-Version: 2.1\nName: {name}\n"
+        + "".join(f"Requires-Dist: {r}\n" for r in requires)
+        + "\nRequires-Dist: not-a-header\n"
+    )
+    return d
+
+
+class DependencyGraphTest(unittest.TestCase):
+    def test_read_requires(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            dist = _dist(
+                pd,
+                "foo",
+                "Bar_Baz (>=1.0)",
+                "qux>=2 ; python_version < '3.11'",
+                "dev-only ; extra == 'dev'",
+            )
+            self.assertEqual(["bar-baz", "qux"], read_requires(dist))
+
+            egg = pd / "foo.egg-info"
+            egg.mkdir()
+            self.assertEqual([], read_requires(egg))
+            (egg / "requires.txt").write_text(
+                "bar\n\n[:python_version < '3.11']\nqux\n\n[dev]\ndev-only\n"
+            )
+            self.assertEqual(["bar", "qux"], read_requires(egg))
+
+    def test_shortest_chains(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            dirs = {
+                "requests": _dist(pd, "requests", "urllib3", "idna"),
+                "httpx": _dist(pd, "httpx", "httpcore"),
+                "httpcore": _dist(pd, "httpcore", "h11", "idna"),
+                "h11": _dist(pd, "h11"),
+                "idna": _dist(pd, "idna"),
+                "urllib3": _dist(pd, "urllib3"),
+            }
+            graph = DependencyGraph(dirs, pd / "cache")
+            self.assertEqual(
+                {
+                    "h11": ["httpx", "httpcore", "h11"],
+                    "idna": ["requests", "idna"],
+                },
+                graph.shortest_chains(["requests", "httpx"], ["h11", "idna", "zzz"]),
+            )
+            graph.save()
+
+            # Cached edges are used as long as the dist dir is unchanged
+            graph = DependencyGraph(dirs, pd / "cache")
+            (dirs["httpx"] / "METADATA").write_text("")
+            self.assertEqual(["httpcore"], graph.requires("httpx"))
+            self.assertEqual([], graph.requires("not-installed"))
+
+            # A cache in some other layout is ignored rather than crashing
+            for text in ("[]", '{"format": 1, "entries": {"x": 1}}', "{"):
+                (pd / "cache" / "checkdeps-requires.json").write_text(text)
+                graph = DependencyGraph(dirs, pd / "cache")
+                self.assertEqual([], graph.requires("httpx"))
@@ -2,7 +2,14 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from ..distinfo_inference import analyze, Dist, DistSet, iterparents, Namespace
+from ..distinfo_inference import (
+    analyze,
+    Dist,
+    DistSet,
+    iterparents,
+    Namespace,
+    UsageIndex,
+)
 
 
 class DistinfoInferenceTest(unittest.TestCase):
@@ -99,3 +106,11 @@ foo.egg-info/installed-files.txt
         self.assertEqual(dist, ds.find_provider("libcst.tests.foo"))
         self.assertEqual(Namespace("libcst"), ds.find_provider("libcst.tests.pyre"))
         self.assertEqual(Namespace("libcst"), ds.find_provider("libcst.tests.pyre.foo"))
+
+    def test_usage_index(self) -> None:
+        usage = UsageIndex()
+        usage.add(Dist("foo", Path(), frozenset(), frozenset()), "a.py", "foo.x")
+        usage.add(Namespace("bar"), "b.py", "bar")
+        usage.add(Namespace("bar"), "b.py", "bar")
+        self.assertEqual({("b.py", "bar")}, usage.users["bar"])
+        self.assertEqual(["baz", "qux"], usage.unused(["qux", "foo", "bar", "baz"]))
@@ -0,0 +1,198 @@
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..distinfo import iter_distinfo_dirs
+from ..distinfo_inference import analyze
+from ..editable import read_finder_mapping, read_pth, SourceScanner
+
+
+def _touch(path: Path, text: str = "") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+class EditableTest(unittest.TestCase):
+    def test_read_pth(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "src").mkdir()
+            (pd / "x.pth").write_text(
+                "# comment\nsrc\nmissing\nimport _foo_finder; _foo_finder.install()\n"
+            )
+            self.assertEqual(([pd / "src"], ["_foo_finder"]), read_pth(pd / "x.pth"))
+
+    def test_read_finder_mapping(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            _touch(
+                pd / "setuptools_finder.py",
+                "import sys\n"
+                "MAPPING: dict[str, str] = {'foo': '/src/foo', 'bar': '/src/bar.py'}\n"
+                "NAMESPACES: dict[str, list[str]] = {}\n"
+                "def install():\n"
+                "    raise Exception('not meant to run')\n",
+            )
+            self.assertEqual(
+                {"foo": Path("/src/foo"), "bar": Path("/src/bar.py")},
+                read_finder_mapping(pd / "setuptools_finder.py"),
+            )
+            _touch(
+                pd / "_baz.py",
+                "from editables.redirector import RedirectingFinder as F\n"
+                "F.install()\n"
+                "F.map_module('baz', '/src/baz/__init__.py')\n",
+            )
+            self.assertEqual(
+                {"baz": Path("/src/baz/__init__.py")},
+                read_finder_mapping(pd / "_baz.py"),
+            )
+
+    def test_analyze_path_pth(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            site = pd / "site-packages"
+            _touch(pd / "proj" / "src" / "foo" / "__init__.py")
+            _touch(pd / "proj" / "src" / "foo" / "sub" / "m.py")
+            _touch(pd / "proj" / "src" / "conftest.py")
+            _touch(site / "__editable__.foo-1.0.pth", f"{pd / 'proj' / 'src'}\n")
+            distinfo = site / "foo-1.0.dist-info"
+            _touch(
+                distinfo / "RECORD",
+                "__editable__.foo-1.0.pth,,\nfoo-1.0.dist-info/RECORD,,\n",
+            )
+            _touch(distinfo / "top_level.txt", "foo\n")
+
+            dist = analyze(distinfo, "foo")
+            self.assertEqual({"foo", "foo.sub.m"}, set(dist.provided_names))
+            self.assertEqual({"foo.sub"}, set(dist.namespace_names))
+
+    def test_analyze_finder(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            site = pd / "site-packages"
+            _touch(pd / "lib" / "__init__.py")
+            _touch(pd / "lib" / "sub" / "__init__.py")
+            _touch(
+                site / "__editable___foo_1_0_finder.py",
+                f"MAPPING = {{'foo': {str(pd / 'lib')!r}}}\n",
+            )
+            _touch(
+                site / "__editable__.foo-1.0.pth",
+                "import __editable___foo_1_0_finder; "
+                "__editable___foo_1_0_finder.install()\n",
+            )
+            distinfo = site / "foo-1.0.dist-info"
+            _touch(
+                distinfo / "RECORD",
+                "__editable__.foo-1.0.pth,,\n__editable___foo_1_0_finder.py,,\n",
+            )
+            dist = analyze(distinfo, "foo")
+            self.assertEqual(
+                {"foo", "foo.sub", "__editable___foo_1_0_finder"},
+                set(dist.provided_names),
+            )
+
+    def test_analyze_direct_url(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            site = pd / "site-packages"
+            _touch(pd / "proj" / "src" / "foo.py")
+            # An import hook we don't understand
+            _touch(site / "_foo.pth", "import _foo_hook\n")
+            distinfo = site / "foo-1.0.dist-info"
+            _touch(distinfo / "RECORD", "_foo.pth,,\n")
+            _touch(
+                distinfo / "direct_url.json",
+                json.dumps(
+                    {"url": (pd / "proj").as_uri(), "dir_info": {"editable": True}}
+                ),
+            )
+            self.assertEqual({"foo"}, set(analyze(distinfo, "foo").provided_names))
+
+    def test_develop(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            site = pd / "site-packages"
+            src = pd / "proj" / "src"
+            _touch(src / "foo" / "__init__.py")
+            _touch(src / "foo.egg-info" / "top_level.txt", "foo\n")
+            _touch(src / "setup_helpers.py")
+            _touch(site / "easy-install.pth", f"{src}\n")
+            _touch(site / "bar-2.0.dist-info" / "RECORD", "bar.py,,\n")
+
+            self.assertEqual(
+                [
+                    ("bar", "2.0", site / "bar-2.0.dist-info"),
+                    ("foo", "", src / "foo.egg-info"),
+                ],
+                list(iter_distinfo_dirs(site)),
+            )
+            dist = analyze(src / "foo.egg-info", "foo")
+            self.assertEqual({"foo"}, set(dist.provided_names))
+
+    def test_egg_info_without_file_list(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            site = Path(d) / "site-packages"
+            _touch(site / "bar" / "__init__.py")
+            _touch(site / "requests" / "api.py")
+            _touch(site / "requests" / "__init__.py")
+            _touch(site / "baz.py")
+            _touch(site / "foo-1.0.egg-info" / "PKG-INFO")
+            _touch(site / "qux.egg-info" / "top_level.txt", "bar\n")
+
+            # Neither is a develop tree, so the neighbours aren't theirs
+            dist = analyze(site / "foo-1.0.egg-info", "foo")
+            self.assertEqual(set(), set(dist.provided_names))
+            dist = analyze(site / "qux.egg-info", "qux")
+            self.assertEqual(set(), set(dist.provided_names))
+
+            # A develop tree, but there's no top_level.txt to go by
+            src = Path(d) / "src"
+            _touch(src / "qux.egg-info" / "PKG-INFO")
+            _touch(src / "qux.py")
+            dist = analyze(src / "qux.egg-info", "qux")
+            self.assertEqual(set(), set(dist.provided_names))
+
+    def test_scanner_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            root = pd / "foo"
+            _touch(root / "__init__.py")
+            _touch(root / "a" / "b.py")
+            _touch(root / "not-a-package" / "c.py")
+            _touch(root / "__pycache__" / "x.cpython-311.pyc")
+
+            scanner = SourceScanner(pd / "cache")
+            self.assertEqual({"foo", "foo.a.b"}, scanner.modules("foo", root))
+            self.assertEqual((0, 1), (scanner.hits, scanner.misses))
+            scanner.save()
+
+            scanner = SourceScanner(pd / "cache")
+            self.assertEqual({"foo", "foo.a.b"}, scanner.modules("foo", root))
+            self.assertEqual((1, 0), (scanner.hits, scanner.misses))
+
+            # A new module changes its directory's mtime
+            _touch(root / "a" / "new.py")
+            os.utime(root / "a", ns=(0, 0))
+            scanner = SourceScanner(pd / "cache")
+            self.assertEqual(
+                {"foo", "foo.a.b", "foo.a.new"}, scanner.modules("foo", root)
+            )
+            self.assertEqual((0, 1), (scanner.hits, scanner.misses))
+
+            # A cache in some other layout, or with a bad entry, is rescanned
+            cache_file = pd / "cache" / "checkdeps-editable.json"
+            for text in (
+                "[]",
+                "{}",
+                json.dumps({"format": 1, "entries": {root.as_posix(): {"dirs": 1}}}),
+            ):
+                cache_file.write_text(text)
+                scanner = SourceScanner(pd / "cache")
+                self.assertEqual(
+                    {"foo", "foo.a.b", "foo.a.new"}, scanner.modules("foo", root)
+                )
+                self.assertEqual((0, 1), (scanner.hits, scanner.misses))
@@ -2,7 +2,7 @@ import tempfile
 import unittest
 from pathlib import Path
 
-from ..import_parser import get_imports
+from ..import_parser import get_imports, iter_imports_isolated
 
 
 class ImportParserTest(unittest.TestCase):
@@ -22,3 +22,25 @@ def func():
 """
             )
             self.assertEqual({"a", "a.b", "a.b.c.z", "d"}, get_imports(pd / "foo.py"))
+
+    def test_isolated(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            paths = []
+            for name in ("a.py", "slow.py", "b.py", "c.py"):
+                paths.append(pd / name)
+                paths[-1].write_text(f"import {name[:-3]}\n")
+            # Takes seconds to parse
+            (pd / "slow.py").write_text("x = [" + "1," * 1_000_000 + "]\n")
+
+            results = sorted(
+                iter_imports_isolated(paths, timeout=0.5, jobs=2),
+                key=lambda r: r.position,
+            )
+            self.assertEqual([["a"], None, ["b"], ["c"]], [r.imports for r in results])
+            self.assertEqual("parse took longer than 0.5s", results[1].error)
+            self.assertGreaterEqual(results[1].seconds, 0.5)
+
+            (pd / "c.py").write_text("import (\n")
+            with self.assertRaises(SyntaxError):
+                list(iter_imports_isolated(paths[2:], timeout=10))
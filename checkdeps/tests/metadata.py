@@ -3,7 +3,9 @@ import unittest
 
 from pathlib import Path
 
-from ..metadata import get_metadata_requirement_names
+from packaging.requirements import Requirement
+
+from ..metadata import get_metadata_requirement_names, requirement_names_for_python
 
 
 class MetadataRequirementsTest(unittest.TestCase):
@@ -55,3 +57,14 @@ dev = ["temp"]
             names = get_metadata_requirement_names(pd)
             self.assertEqual({"foo", "bar"}, names[""])
             self.assertEqual({"temp"}, names["dev"])
+
+    def test_requirement_names_for_python(self) -> None:
+        reqs = [
+            Requirement("Foo"),
+            Requirement("toml ; python_version < '3.11'"),
+            Requirement("bar ; python_full_version >= '3.12.0'"),
+        ]
+        self.assertEqual({"foo", "toml", "bar"}, requirement_names_for_python(reqs))
+        self.assertEqual({"foo", "toml"}, requirement_names_for_python(reqs, "3.8"))
+        self.assertEqual({"foo"}, requirement_names_for_python(reqs, "3.11"))
+        self.assertEqual({"foo", "bar"}, requirement_names_for_python(reqs, "3.12"))
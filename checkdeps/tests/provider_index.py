@@ -0,0 +1,158 @@
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+from ..distinfo_inference import (
+    Allowed,
+    Dist,
+    DistSet,
+    Namespace,
+    prefix_sort_key,
+    provider_key,
+    Stdlib,
+)
+from ..import_parser import iter_imports_isolated
+from ..provider_index import ProviderIndex, write_provider_index
+from ..resolve import iter_results
+
+
+def _distset() -> DistSet:
+    ds = DistSet()
+    ds.add_dist(
+        Dist(
+            "libcst",
+            Path(),
+            provided_names=frozenset({"libcst", "libcst.tests.foo"}),
+            namespace_names=frozenset({"libcst.tests.pyre"}),
+        )
+    )
+    ds.add_dist(Dist("zzz", Path(), frozenset({"zzz", "été"}), frozenset()))
+    ds.add_explicit("myproj", Allowed("myproj"))
+    ds.add_explicit("sys", Stdlib("sys"))
+    return ds
+
+
+class ProviderIndexTest(unittest.TestCase):
+    def test_matches_distset(self) -> None:
+        ds = _distset()
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d, "providers.idx")
+            write_provider_index(ds, path)
+            index = ProviderIndex(path)
+            try:
+                self.assertEqual(len(ds.provided_names), index.num_names)
+                self.assertEqual(
+                    sorted(ds.provided_names, key=lambda n: (n + ".").encode()),
+                    [name for name, _ in index],
+                )
+                for name in (
+                    "libcst",
+                    "libcst.tests",
+                    "libcst.tests.foo.bar",
+                    "libcst.tests.pyre.x",
+                    "libcs",
+                    "myproj.sub",
+                    "sys",
+                    "sysx",
+                    "zzz.a",
+                    "été",
+                    "",
+                ):
+                    prov = ds.find_provider(name)
+                    self.assertEqual(
+                        provider_key(prov) if prov else None,
+                        index.find_provider(name),
+                        name,
+                    )
+                self.assertEqual(
+                    ("Namespace", "libcst"), index.get("libcst.tests.pyre")
+                )
+                self.assertEqual(
+                    Namespace("libcst"), ds.from_key(("Namespace", "libcst"))
+                )
+            finally:
+                index.close()
+
+    def test_find_providers(self) -> None:
+        ds = _distset()
+        names = sorted(
+            {
+                "libcs",
+                "libcst",
+                "libcst-x",
+                "libcst.tests",
+                "libcst.tests.foo.bar",
+                "libcst.tests.pyre.x",
+                "libcst_x",
+                "myproj.sub",
+                "sys",
+                "sysx",
+                "zzz.a",
+                "été",
+            },
+            key=prefix_sort_key,
+        )
+        expected = {n: ds.find_provider(n) for n in names}
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d, "providers.idx")
+            write_provider_index(ds, path)
+            index = ProviderIndex(path)
+            try:
+                # Any contiguous range, not just the whole list
+                for start in range(len(names)):
+                    for end in range(start, len(names) + 1):
+                        self.assertEqual(
+                            [
+                                (n, provider_key(p) if (p := expected[n]) else None)
+                                for n in names[start:end]
+                            ],
+                            index.find_providers(names[start:end]),
+                        )
+            finally:
+                index.close()
+
+    def test_empty_and_invalid(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d, "providers.idx")
+            write_provider_index(DistSet(), path)
+            index = ProviderIndex(path)
+            self.assertIsNone(index.find_provider("foo"))
+            index.close()
+
+            path.write_bytes(b"nope" + b"\0" * 12)
+            with self.assertRaises(ValueError):
+                ProviderIndex(path)
+
+    def test_iter_results_jobs(self) -> None:
+        ds = _distset()
+        other = DistSet(dict(ds.provided_names))
+        other.add_explicit("zzz", Stdlib("zzz"))
+        distsets = {"a": ds, "b": other}
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for n in range(5):
+                p = Path(d, f"f{n}.py")
+                p.write_text(f"import sys\nimport libcst.tests.pyre\nimport zzz.m{n}\n")
+                paths.append(p)
+
+            serial = list(iter_results(paths, distsets))
+            self.assertEqual(serial, list(iter_results(paths, distsets, jobs=2)))
+            self.assertEqual(("zzz.m3", Stdlib("zzz")), serial[3]["b"][2])
+
+            # The pool isn't started while the parse children are running
+            calls = mock.Mock()
+            with mock.patch(
+                "checkdeps.resolve.iter_imports_isolated", wraps=iter_imports_isolated
+            ) as parse:
+                with mock.patch(
+                    "checkdeps.resolve.ProcessPoolExecutor", wraps=ProcessPoolExecutor
+                ) as pool:
+                    calls.attach_mock(parse, "parse")
+                    calls.attach_mock(pool, "pool")
+                    self.assertEqual(
+                        serial,
+                        list(iter_results(paths, distsets, jobs=2, parse_timeout=10)),
+                    )
+            self.assertEqual(["parse", "pool"], [c[0] for c in calls.mock_calls[:2]])
@@ -0,0 +1,130 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from packaging.utils import canonicalize_name
+
+from .. import requirements
+from ..requirements import (
+    iter_glob_all_requirement_names,
+    iter_glob_all_requirements,
+    iter_requirement_lines,
+    iter_requirement_names,
+    parse_requirements_file,
+)
+
+
+class RequirementsTest(unittest.TestCase):
+    def test_parse(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "requirements.txt").write_text(
+                """\
+# comment
+--index-url https://example.com/simple
+-r base.txt
+-rsub/other.txt
+--constraint=constraints.txt
+-e git+https://example.com/repo.git#egg=Editable_Thing
+-e ./local
+Foo[extra]>=1.0 ; python_version < '3.11'  # trailing comment
+bar==2 \\
+    --hash=sha256:abcd
+baz @ https://example.com/baz.tar.gz#sha256=abcd
+https://example.com/qux.tar.gz#egg=qux
+"""
+            )
+            parsed = parse_requirements_file(pd / "requirements.txt")
+            self.assertEqual(
+                [
+                    "Editable_Thing",
+                    "Foo[extra]>=1.0 ; python_version < '3.11'",
+                    "bar==2",
+                    "baz @ https://example.com/baz.tar.gz#sha256=abcd",
+                    "qux",
+                ],
+                parsed.lines,
+            )
+            self.assertEqual(
+                [
+                    (pd / "base.txt", False),
+                    (pd / "sub" / "other.txt", False),
+                    (pd / "constraints.txt", True),
+                ],
+                parsed.includes,
+            )
+
+    def test_names_match_requirements(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "requirements.txt").write_text(
+                """\
+foo>=1
+https://example.com/pkg-1.0.tar.gz
+git+https://example.com/repo.git
+https://example.com/qux.tar.gz#egg=qux
+./local
+/abs/path
+baz @ https://example.com/baz.tar.gz
+"""
+            )
+            names = list(iter_glob_all_requirement_names("requirements.txt", pd))
+            self.assertEqual(["foo", "qux", "baz"], names)
+            self.assertEqual(
+                names,
+                [
+                    canonicalize_name(r.name)
+                    for r in iter_glob_all_requirements("requirements.txt", pd)
+                ],
+            )
+
+    def test_includes(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "sub").mkdir()
+            (pd / "requirements.txt").write_text("-r base.txt\n-r sub/dev.txt\nfoo\n")
+            (pd / "base.txt").write_text("-c constraints.txt\nbase\n")
+            (pd / "constraints.txt").write_text("pinned==1\n")
+            # Relative to the including file; includes base.txt again, and cycles
+            (pd / "sub" / "dev.txt").write_text(
+                "-r ../base.txt\n-r ../requirements.txt\ndev\n"
+            )
+            (pd / "requirements-test.txt").write_text("-r base.txt\ntest\n")
+
+            with self.assertLogs("checkdeps.requirements", "WARNING") as logs:
+                self.assertEqual(
+                    ["foo", "base", "dev"],
+                    list(iter_requirement_names(pd / "requirements.txt")),
+                )
+            self.assertIn(
+                "Cycle in requirements includes: "
+                "requirements.txt -> dev.txt -> requirements.txt",
+                logs.output[0],
+            )
+
+            with mock.patch.object(
+                requirements,
+                "parse_requirements_file",
+                wraps=parse_requirements_file,
+            ) as parse:
+                self.assertEqual(
+                    ["test", "base", "foo", "dev"],
+                    list(iter_glob_all_requirement_names("requirements*.txt", pd)),
+                )
+            # Each file parsed once, despite being included several times
+            self.assertEqual(5, parse.call_count)
+
+            self.assertEqual(
+                ["test", "base", "foo", "dev"],
+                [r.name for r in iter_glob_all_requirements("requirements*.txt", pd)],
+            )
+
+    def test_missing_include(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            (pd / "requirements.txt").write_text("-r missing.txt\nfoo\n")
+            with self.assertLogs("checkdeps.requirements", "WARNING"):
+                self.assertEqual(
+                    ["foo"], list(iter_requirement_lines([pd / "requirements.txt"]))
+                )
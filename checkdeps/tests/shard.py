@@ -0,0 +1,34 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from ..shard import assign_shards, parse_shard
+
+
+class ShardTest(unittest.TestCase):
+    def test_parse_shard(self) -> None:
+        self.assertEqual((2, 3), parse_shard("2/3"))
+        with self.assertRaises(ValueError):
+            parse_shard("0/3")
+        with self.assertRaises(ValueError):
+            parse_shard("4/3")
+        with self.assertRaises(ValueError):
+            parse_shard("x")
+
+    def test_assign_shards(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d)
+            paths = []
+            for i, size in enumerate([100, 60, 50, 10, 0, 0]):
+                p = pd / f"f{i}.py"
+                p.write_text("#" * size)
+                paths.append(p)
+
+            assignment = assign_shards(paths, pd, 2)
+            self.assertEqual(assignment, assign_shards(reversed(paths), pd, 2))
+            self.assertEqual(set(paths), set(assignment))
+
+            loads = {1: 0, 2: 0}
+            for p, k in assignment.items():
+                loads[k] += p.stat().st_size
+            self.assertEqual({1: 110, 2: 110}, loads)
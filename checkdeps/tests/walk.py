@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from ..walk import compile_excludes, walk, WalkStats
+
+
+class WalkTest(unittest.TestCase):
+    def test_compile_excludes(self) -> None:
+        m = compile_excludes(["build/", "*.pyc", "/top"])
+        self.assertTrue(m("build/"))
+        self.assertTrue(m("a/build/"))
+        self.assertFalse(m("build"))
+        self.assertTrue(m("a/x.pyc"))
+        self.assertTrue(m("top"))
+        self.assertFalse(m("a/top"))
+
+        # Negations fall back to last-match-wins
+        m = compile_excludes(["*.py", "!keep.py"])
+        self.assertTrue(m("a.py"))
+        self.assertFalse(m("keep.py"))
+
+        self.assertFalse(compile_excludes(None)("a.py"))
+
+    def test_walk(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            pd = Path(d).resolve()
+            (pd / ".git").mkdir()
+            (pd / ".gitignore").write_text("gen/\n")
+            for name in (
+                "a.py",
+                "b.txt",
+                "pkg/c.py",
+                "pkg/vendored/d.py",
+                "pkg/.gitignore",
+                "gen/e.py",
+                "node_modules/f.py",
+                "env/pyvenv.cfg",
+                "env/g.py",
+                "skip.py",
+            ):
+                (pd / name).parent.mkdir(parents=True, exist_ok=True)
+                (pd / name).write_text("")
+            (pd / "pkg" / ".gitignore").write_text("vendored/\n")
+
+            stats = WalkStats()
+            with mock.patch("checkdeps.walk.os.scandir", wraps=os.scandir) as scandir:
+                self.assertEqual(
+                    [pd / "a.py", pd / "pkg" / "c.py"],
+                    list(walk(pd, excludes=["skip.py"], stats=stats)),
+                )
+            # Pruned directories, including the virtualenv, are never listed
+            self.assertEqual(
+                [str(pd), str(pd / "pkg")],
+                [call.args[0] for call in scandir.call_args_list],
+            )
+            # .git, gen, node_modules, env, pkg/vendored
+            self.assertEqual(5, stats.dirs_skipped)
+            self.assertEqual(1, stats.files_skipped)
+
+            self.assertEqual([pd / "pkg" / "c.py"], list(walk(pd / "pkg")))
+            self.assertEqual([pd / "b.txt"], list(walk(pd / "b.txt")))
+            self.assertEqual([], list(walk(pd / "gen")))